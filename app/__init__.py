@@ -5,10 +5,47 @@ This module creates and configures the Flask application for XML processing.
 """
 
 import os
+import re
+import hashlib
 import logging
-from flask import Flask
+import orjson
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
 
+# Local web UI origins allowed to call the API
+CORS_ORIGINS = re.compile(r'^http://(localhost|127\.0\.0\.1):3000$')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson instead of the stdlib encoder"""
+    
+    sort_keys = False
+    
+    def _options(self, sort_keys: bool, indent: bool) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+    
+    def dumps(self, obj, **kwargs):
+        option = self._options(kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent'))
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        
+        # Pretty-print only while debugging, matching Flask's default provider
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(self.sort_keys, indent))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 
 def create_app(config_name=None):
     """
@@ -21,15 +58,23 @@ def create_app(config_name=None):
         Flask application instance
     """
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
-    # Configure CORS for web UI integration
-    CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000'])
+    # Configure CORS for web UI integration; preflight results are cached
+    # by the browser for a day
+    CORS(
+        app,
+        origins=CORS_ORIGINS,
+        methods=['GET', 'POST', 'DELETE'],
+        allow_headers=['Content-Type', 'Authorization'],
+        send_wildcard=False,
+        max_age=86400
+    )
     
     # Basic configuration
     app.config.update(
         SECRET_KEY=os.getenv('SECRET_KEY', 'xml-mcp-template-dev-key'),
-        JSON_SORT_KEYS=False,
-        JSONIFY_PRETTYPRINT_REGULAR=True
+        JSON_SORT_KEYS=False
     )
     
     # Configure logging
@@ -43,6 +88,10 @@ def create_app(config_name=None):
     # Register error handlers
     register_error_handlers(app)
     
+    # Compress responses and answer conditional GETs
+    Compress(app)
+    register_etag_handler(app)
+    
     # Health check endpoint
     @app.route('/health')
     def health_check():
@@ -67,6 +116,21 @@ def create_app(config_name=None):
     return app
 
 
+def register_etag_handler(app):
+    """Tag GET responses with a content hash so unchanged bodies return 304"""
+    
+    # Registered after Compress, so this runs first and hashes the
+    # uncompressed body; Compress then suffixes the tag with the encoding
+    @app.after_request
+    def add_etag(response):
+        if (request.method in ('GET', 'HEAD') and response.status_code == 200
+                and not response.is_streamed and 'ETag' not in response.headers):
+            digest = hashlib.blake2b(response.get_data(), digest_size=8).hexdigest()
+            response.set_etag(digest)
+            response.make_conditional(request)
+        return response
+
+
 def register_error_handlers(app):
     """Register global error handlers"""
     
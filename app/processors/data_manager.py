@@ -2,44 +2,267 @@
 Data Manager for XML-MCP Template
 
 This module handles data storage and retrieval for the Flask server.
-Uses TinyDB for simple JSON-based storage.
+Uses SQLite for indexed storage of processing results.
 """
 
+import atexit
 import logging
+import queue
+import sqlite3
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from tinydb import TinyDB, Query
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Metadata columns are indexed for lookups and filtering; the full result
+# document is kept as a JSON payload.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    result_id TEXT PRIMARY KEY,
+    input_type TEXT,
+    template TEXT,
+    status TEXT,
+    stored_at TEXT,
+    complexity_score REAL,
+    payload TEXT NOT NULL,
+    stored_at_ts REAL
+);
+CREATE INDEX IF NOT EXISTS idx_results_input_type ON results (input_type);
+CREATE INDEX IF NOT EXISTS idx_results_template ON results (template);
+CREATE INDEX IF NOT EXISTS idx_results_status ON results (status);
+CREATE INDEX IF NOT EXISTS idx_results_complexity_score ON results (complexity_score);
+CREATE INDEX IF NOT EXISTS idx_results_stored_at_ts ON results (stored_at_ts);
+"""
+
+# Statements are kept as module constants so every call reuses the same
+# SQL text and hits sqlite3's prepared statement cache
+INSERT_SQL = (
+    "INSERT OR REPLACE INTO results (result_id, input_type, template, status, "
+    "stored_at, complexity_score, payload, stored_at_ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+SELECT_BY_ID_SQL = "SELECT payload FROM results WHERE result_id = ?"
+DELETE_BY_ID_SQL = "DELETE FROM results WHERE result_id = ?"
+SEARCH_SQL = "SELECT payload FROM results"
+
+# search_results query keys and the conditions they compile to
+SEARCH_FILTERS = {
+    'input_type': "input_type = ?",
+    'template': "template = ?",
+    'status': "status = ?",
+    'min_complexity': "complexity_score >= ?",
+    'max_complexity': "complexity_score <= ?"
+}
+
+# Seconds a cached listing/statistics result may be served without a write
+READ_CACHE_TTL = 30
+
+# Rows fetched per round trip when streaming results with iter_all
+STREAM_BATCH_SIZE = 500
+
+# Bytes of the database file SQLite may memory-map for reads
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Most queued writes the write-behind thread commits in one transaction
+WRITE_BATCH_SIZE = 100
+
+# PRAGMA user_version once the legacy storage/data.json has been imported,
+# so results deleted afterwards are not imported again on the next start
+LEGACY_IMPORTED = 1
+
+# Last formatted stored_at as (millisecond, ISO string); writes landing in
+# the same millisecond reuse the string instead of formatting a new one
+_last_stamp: Tuple[int, str] = (0, '')
+
+
+def _timestamp() -> Tuple[float, str]:
+    """Read the clock once and return (epoch seconds, ISO string)"""
+    global _last_stamp
+    now = time.time()
+    millis = int(now * 1000)
+    stamp = _last_stamp
+    if stamp[0] != millis:
+        stamp = _last_stamp = (millis, datetime.fromtimestamp(now).isoformat())
+    return now, stamp[1]
+
+
+def _to_epoch(stored_at: Optional[str]) -> Optional[float]:
+    """Convert an ISO stored_at string to epoch seconds"""
+    try:
+        return datetime.fromisoformat(stored_at).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+# Shared stand-in for a missing analysis section; never mutated
+_EMPTY: Dict[str, Any] = {}
+
+
+def _summarize(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a stored result onto the summary fields used by list_all"""
+    get = result.get
+    analysis = get('analysis') or _EMPTY
+    return {
+        'result_id': get('result_id'),
+        'processing_id': get('processing_id'),
+        'output_id': get('output_id'),
+        'input_type': get('input_type'),
+        'template': get('template'),
+        'status': get('status'),
+        'timestamp': get('timestamp'),
+        'stored_at': get('stored_at'),
+        'word_count': analysis.get('word_count', 0),
+        'complexity_score': analysis.get('complexity_score', 0)
+    }
+
 
 class DataManager:
     """
     Manages data storage and retrieval for processing results
     
-    Uses TinyDB for lightweight JSON storage. Can be extended to use
-    other databases like SQLite, PostgreSQL, etc.
+    Uses SQLite with indexed metadata columns, so lookups by ID and
+    filtered searches do not scan every stored result.
     """
     
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, legacy_path: Optional[Path] = None,
+                 write_behind: bool = False):
         """
         Initialize data manager
         
         Args:
-            db_path: Path to database file (defaults to storage/data.json)
+            db_path: Path to database file (defaults to storage/data.db),
+                or ":memory:" for a throwaway in-memory database
+            legacy_path: TinyDB JSON file imported once into a new database
+                (defaults to storage/data.json with the default database)
+            write_behind: Let store_result_async queue writes on a background
+                thread; leave off when other processes read the same database,
+                since queued results are only visible to this process
         """
         if db_path is None:
             base_dir = Path(__file__).parent.parent.parent
             storage_dir = base_dir / "storage"
             storage_dir.mkdir(exist_ok=True)
-            db_path = storage_dir / "data.json"
+            db_path = storage_dir / "data.db"
+            if legacy_path is None:
+                legacy_path = storage_dir / "data.json"
         
         self.db_path = db_path
-        self.db = TinyDB(db_path)
+        self.write_behind = write_behind
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        
+        # WAL lets readers run alongside a writer and, with synchronous=NORMAL,
+        # commits append to the log instead of syncing the database file
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        
+        # Reads come straight from the OS page cache instead of being
+        # copied into SQLite's own page cache
+        self.conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        
+        # Read cache for list_all/get_statistics, invalidated on every write
+        self._version = 0
+        self._read_cache: Dict[tuple, tuple] = {}
+        
+        # Write-behind queue of (result_id, document, row) for
+        # store_result_async; queued documents stay in _pending until
+        # committed so get_result can still serve them
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any], tuple]]" = queue.Queue()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._writer: Optional[threading.Thread] = None
+        
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+        
+        if legacy_path is not None and legacy_path.exists():
+            self._import_legacy_json(legacy_path)
         
         logger.info(f"DataManager initialized with database: {db_path}")
     
+    def _import_legacy_json(self, json_path: Path):
+        """Import results from a TinyDB JSON file into a new database, once"""
+        try:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] >= LEGACY_IMPORTED:
+                return
+            
+            # Databases filled before the import was recorded count as done
+            if self.conn.execute("SELECT 1 FROM results LIMIT 1").fetchone():
+                with self._lock, self.conn:
+                    self.conn.execute(f"PRAGMA user_version = {LEGACY_IMPORTED}")
+                return
+            
+            tables = orjson.loads(json_path.read_bytes())
+            
+            rows = [
+                self._to_row(doc['result_id'], doc)
+                for doc in tables.get('_default', {}).values()
+                if doc.get('result_id')
+            ]
+            
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    INSERT_SQL,
+                    rows
+                )
+                self.conn.execute(f"PRAGMA user_version = {LEGACY_IMPORTED}")
+                self._invalidate()
+            logger.info(f"Imported {len(rows)} results from {json_path}")
+        
+        except Exception as e:
+            logger.error(f"Error importing legacy data from {json_path}: {e}")
+    
+    @staticmethod
+    def _to_row(result_id: str, data: Dict[str, Any]) -> tuple:
+        """Build a results table row from a result document"""
+        analysis = data.get('analysis')
+        complexity_score = analysis.get('complexity_score') if isinstance(analysis, dict) else None
+        
+        return (
+            result_id,
+            data.get('input_type'),
+            data.get('template'),
+            data.get('status'),
+            data.get('stored_at'),
+            complexity_score,
+            orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS),
+            data.get('stored_at_ts') or _to_epoch(data.get('stored_at'))
+        )
+    
+    def _invalidate(self):
+        """Drop cached reads after a write (caller holds the lock)"""
+        self._version += 1
+        self._read_cache.clear()
+    
+    def _cached(self, key: tuple, build: Callable[[], Any]) -> Any:
+        """
+        Return a cached read result, rebuilding it when stale
+        
+        Entries are keyed by this manager's write counter and SQLite's
+        data_version, which changes when another connection (e.g. another
+        worker process) commits to the same database.
+        """
+        with self._lock:
+            version = (self._version, self.conn.execute("PRAGMA data_version").fetchone()[0])
+            hit = self._read_cache.get(key)
+        
+        if hit and hit[0] == version and hit[1] > time.monotonic():
+            return hit[2]
+        
+        value = build()
+        with self._lock:
+            self._read_cache[key] = (version, time.monotonic() + READ_CACHE_TTL, value)
+        return value
+    
+    def _count_by(self, expression: str) -> Dict[str, int]:
+        """Count results grouped by a SQL expression (caller holds the lock)"""
+        rows = self.conn.execute(
+            f"SELECT {expression}, COUNT(*) FROM results GROUP BY 1"
+        ).fetchall()
+        return dict(rows)
+    
     def store_result(self, result_id: str, data: Dict[str, Any]) -> bool:
         """
         Store processing result
@@ -52,32 +275,163 @@ class DataManager:
             True if successful, False otherwise
         """
         try:
+            stored_at_ts, stored_at = _timestamp()
+            
             # Add metadata
             data.update({
                 'result_id': result_id,
-                'stored_at': datetime.now().isoformat(),
+                'stored_at': stored_at,
+                'stored_at_ts': stored_at_ts,
                 'version': '1.0'
             })
             
-            # Check if result already exists
-            Result = Query()
-            existing = self.db.search(Result.result_id == result_id)
-            
-            if existing:
-                # Update existing
-                self.db.update(data, Result.result_id == result_id)
-                logger.info(f"Updated existing result: {result_id}")
-            else:
-                # Insert new
-                self.db.insert(data)
-                logger.info(f"Stored new result: {result_id}")
+            # Insert new or replace existing
+            with self._lock, self.conn:
+                self.conn.execute(
+                    INSERT_SQL,
+                    self._to_row(result_id, data)
+                )
+                self._invalidate()
             
+            logger.info(f"Stored result: {result_id}")
             return True
             
         except Exception as e:
             logger.error(f"Error storing result {result_id}: {e}")
             return False
     
+    def store_result_async(self, result_id: str, data: Dict[str, Any]) -> bool:
+        """
+        Queue a processing result to be stored by a background thread
+        
+        The caller returns without waiting for SQLite. Queued results are
+        committed in batches and can be read back with get_result at once.
+        Falls back to store_result when write-behind is off.
+        
+        Args:
+            result_id: Unique identifier for the result
+            data: Result data to store
+            
+        Returns:
+            True once the result is queued, False if it cannot be serialized
+        """
+        if not self.write_behind:
+            return self.store_result(result_id, data)
+        
+        try:
+            stored_at_ts, stored_at = _timestamp()
+            
+            # Add metadata
+            data.update({
+                'result_id': result_id,
+                'stored_at': stored_at,
+                'stored_at_ts': stored_at_ts,
+                'version': '1.0'
+            })
+            
+            # Serialize now so a bad document fails its own request rather
+            # than the batch it would be committed with
+            row = self._to_row(result_id, data)
+        
+        except Exception as e:
+            logger.error(f"Error storing result {result_id}: {e}")
+            return False
+        
+        with self._lock:
+            self._pending[result_id] = data
+            if self._writer is None:
+                # Started on first use so forked workers each get their own
+                self._writer = threading.Thread(target=self._write_behind, name="data-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+        
+        self._queue.put((result_id, data, row))
+        return True
+    
+    def _write_behind(self):
+        """Commit queued results in batches (runs on the writer thread)"""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                with self._lock, self.conn:
+                    self.conn.executemany(
+                        INSERT_SQL,
+                        [row for _, _, row in batch]
+                    )
+                    self._invalidate()
+                logger.info(f"Stored {len(batch)} queued results")
+            
+            except Exception as e:
+                # Retry one at a time so a single bad row loses only itself
+                logger.warning(f"Error storing {len(batch)} queued results, retrying individually: {e}")
+                self._write_each(batch)
+            
+            finally:
+                with self._lock:
+                    for result_id, data, _ in batch:
+                        # A newer write for the same ID may still be queued
+                        if self._pending.get(result_id) is data:
+                            del self._pending[result_id]
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _write_each(self, batch: List[Tuple[str, Dict[str, Any], tuple]]):
+        """Commit queued results one transaction each (runs on the writer thread)"""
+        for result_id, _, row in batch:
+            try:
+                with self._lock, self.conn:
+                    self.conn.execute(INSERT_SQL, row)
+                    self._invalidate()
+            except Exception as e:
+                logger.error(f"Error storing queued result {result_id}: {e}")
+    
+    def flush(self):
+        """Wait until every queued result has been written"""
+        if self._writer is not None:
+            self._queue.join()
+    
+    def store_results_bulk(self, items: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """
+        Store several processing results in one transaction
+        
+        Args:
+            items: (result_id, data) pairs to store
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            stored_at_ts, stored_at = _timestamp()
+            
+            # Add metadata
+            for result_id, data in items:
+                data.update({
+                    'result_id': result_id,
+                    'stored_at': stored_at,
+                    'stored_at_ts': stored_at_ts,
+                    'version': '1.0'
+                })
+            
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    INSERT_SQL,
+                    [self._to_row(result_id, data) for result_id, data in items]
+                )
+                self._invalidate()
+            
+            logger.info(f"Stored {len(items)} results")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error storing {len(items)} results: {e}")
+            return False
+    
     def get_result(self, result_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve processing result by ID
@@ -89,12 +443,20 @@ class DataManager:
             Result data if found, None otherwise
         """
         try:
-            Result = Query()
-            results = self.db.search(Result.result_id == result_id)
-            
-            if results:
+            with self._lock:
+                pending = self._pending.get(result_id)
+                row = None if pending else self.conn.execute(
+                    SELECT_BY_ID_SQL,
+                    (result_id,)
+                ).fetchone()
+            
+            if pending:
+                logger.info(f"Retrieved queued result: {result_id}")
+                return dict(pending)
+            
+            if row:
                 logger.info(f"Retrieved result: {result_id}")
-                return results[0]
+                return orjson.loads(row[0])
             else:
                 logger.warning(f"Result not found: {result_id}")
                 return None
@@ -114,42 +476,58 @@ class DataManager:
             List of result summaries
         """
         try:
-            all_results = self.db.all()
-            
-            # Sort by stored_at timestamp (most recent first)
-            all_results.sort(
-                key=lambda x: x.get('stored_at', ''), 
-                reverse=True
-            )
-            
-            # Apply limit if specified
-            if limit:
-                all_results = all_results[:limit]
-            
-            # Return summary information
-            summaries = []
-            for result in all_results:
-                summary = {
-                    'result_id': result.get('result_id'),
-                    'processing_id': result.get('processing_id'),
-                    'output_id': result.get('output_id'),
-                    'input_type': result.get('input_type'),
-                    'template': result.get('template'),
-                    'status': result.get('status'),
-                    'timestamp': result.get('timestamp'),
-                    'stored_at': result.get('stored_at'),
-                    'word_count': result.get('analysis', {}).get('word_count', 0) if result.get('analysis') else 0,
-                    'complexity_score': result.get('analysis', {}).get('complexity_score', 0) if result.get('analysis') else 0
-                }
-                summaries.append(summary)
-            
-            logger.info(f"Listed {len(summaries)} results")
-            return summaries
+            self.flush()
+            return self._cached(('list_all', limit), lambda: self._list_all(limit))
             
         except Exception as e:
             logger.error(f"Error listing results: {e}")
             return []
     
+    def _list_all(self, limit: Optional[int]) -> List[Dict[str, Any]]:
+        """Build result summaries for list_all"""
+        # Most recent first; the stored_at_ts index serves the ORDER BY, and
+        # a negative LIMIT means no limit in SQLite
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT payload FROM results ORDER BY stored_at_ts DESC LIMIT ?",
+                (limit or -1,)
+            ).fetchall()
+        
+        summaries = [_summarize(orjson.loads(payload)) for (payload,) in rows]
+        
+        logger.info(f"Listed {len(summaries)} results")
+        return summaries
+    
+    def iter_all(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over result summaries without materializing the full list
+        
+        Returns:
+            Iterator of result summaries, most recent first
+        """
+        if str(self.db_path) == ':memory:':
+            # A second connection cannot see an in-memory database
+            yield from self.list_all()
+            return
+        
+        self.flush()
+        
+        # A separate read-only connection keeps a consistent WAL snapshot for
+        # the whole stream without holding the shared connection's lock
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            cursor = conn.execute("SELECT payload FROM results ORDER BY stored_at_ts DESC")
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                for (payload,) in rows:
+                    yield _summarize(orjson.loads(payload))
+        finally:
+            conn.close()
+    
     def delete_result(self, result_id: str) -> bool:
         """
         Delete processing result by ID
@@ -161,8 +539,13 @@ class DataManager:
             True if successful, False otherwise
         """
         try:
-            Result = Query()
-            deleted = self.db.remove(Result.result_id == result_id)
+            self.flush()
+            with self._lock, self.conn:
+                deleted = self.conn.execute(
+                    DELETE_BY_ID_SQL,
+                    (result_id,)
+                ).rowcount
+                self._invalidate()
             
             if deleted:
                 logger.info(f"Deleted result: {result_id}")
@@ -186,31 +569,20 @@ class DataManager:
             List of matching results
         """
         try:
-            Result = Query()
-            conditions = []
-            
-            # Build search conditions
-            for key, value in query.items():
-                if key == 'input_type':
-                    conditions.append(Result.input_type == value)
-                elif key == 'template':
-                    conditions.append(Result.template == value)
-                elif key == 'status':
-                    conditions.append(Result.status == value)
-                elif key == 'min_complexity':
-                    conditions.append(Result.analysis.complexity_score >= value)
-                elif key == 'max_complexity':
-                    conditions.append(Result.analysis.complexity_score <= value)
+            self.flush()
+            
+            # Build search conditions, ignoring unknown keys
+            filters = [(SEARCH_FILTERS[key], value) for key, value in query.items() if key in SEARCH_FILTERS]
             
             # Combine conditions with AND
-            if conditions:
-                combined_condition = conditions[0]
-                for condition in conditions[1:]:
-                    combined_condition = combined_condition & condition
+            sql = SEARCH_SQL
+            params = [value for _, value in filters]
+            if filters:
+                sql += " WHERE " + " AND ".join(clause for clause, _ in filters)
                 
-                results = self.db.search(combined_condition)
-            else:
-                results = self.db.all()
+            with self._lock:
+                rows = self.conn.execute(sql, params).fetchall()
+            results = [orjson.loads(payload) for (payload,) in rows]
             
             logger.info(f"Search found {len(results)} results")
             return results
@@ -227,54 +599,41 @@ class DataManager:
             Dictionary with statistics
         """
         try:
-            all_results = self.db.all()
+            self.flush()
+            return self._cached(('statistics',), self._statistics)
+            
+        except Exception as e:
+            logger.error(f"Error generating statistics: {e}")
+            return {}
+    
+    def _statistics(self) -> Dict[str, Any]:
+        """Build database statistics for get_statistics"""
+        # Count recent activity (last 24 hours)
+        recent_cutoff = time.time() - 24 * 60 * 60
+        
+        with self._lock:
+            total, recent = self.conn.execute(
+                "SELECT COUNT(*), COUNT(CASE WHEN stored_at_ts > ? THEN 1 END) FROM results",
+                (recent_cutoff,)
+            ).fetchone()
             
             stats = {
-                'total_results': len(all_results),
-                'input_types': {},
-                'templates': {},
-                'status_counts': {},
+                'total_results': total,
+                'input_types': self._count_by("COALESCE(input_type, 'unknown')"),
+                'templates': self._count_by("COALESCE(template, 'unknown')"),
+                'status_counts': self._count_by("COALESCE(status, 'unknown')"),
                 'complexity_distribution': {'low': 0, 'medium': 0, 'high': 0},
-                'recent_activity': 0
+                'recent_activity': recent
             }
             
-            # Count recent activity (last 24 hours)
-            from datetime import datetime, timedelta
-            recent_cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
-            
-            for result in all_results:
-                # Input types
-                input_type = result.get('input_type', 'unknown')
-                stats['input_types'][input_type] = stats['input_types'].get(input_type, 0) + 1
-                
-                # Templates
-                template = result.get('template', 'unknown')
-                stats['templates'][template] = stats['templates'].get(template, 0) + 1
-                
-                # Status
-                status = result.get('status', 'unknown')
-                stats['status_counts'][status] = stats['status_counts'].get(status, 0) + 1
-                
-                # Complexity distribution
-                complexity = result.get('analysis', {}).get('complexity_score', 0)
-                if complexity <= 5:
-                    stats['complexity_distribution']['low'] += 1
-                elif complexity <= 10:
-                    stats['complexity_distribution']['medium'] += 1
-                else:
-                    stats['complexity_distribution']['high'] += 1
-                
-                # Recent activity
-                stored_at = result.get('stored_at', '')
-                if stored_at > recent_cutoff:
-                    stats['recent_activity'] += 1
-            
-            logger.info("Generated database statistics")
-            return stats
-            
-        except Exception as e:
-            logger.error(f"Error generating statistics: {e}")
-            return {}
+            # Complexity distribution
+            stats['complexity_distribution'].update(self._count_by(
+                "CASE WHEN COALESCE(complexity_score, 0) <= 5 THEN 'low' "
+                "WHEN complexity_score <= 10 THEN 'medium' ELSE 'high' END"
+            ))
+        
+        logger.info("Generated database statistics")
+        return stats
     
     def cleanup_old_results(self, days_old: int = 30) -> int:
         """
@@ -287,20 +646,21 @@ class DataManager:
             Number of results deleted
         """
         try:
-            from datetime import datetime, timedelta
+            cutoff = time.time() - days_old * 24 * 60 * 60
             
-            cutoff_date = (datetime.now() - timedelta(days=days_old)).isoformat()
+            self.flush()
+            with self._lock, self.conn:
+                deleted = self.conn.execute(
+                    "DELETE FROM results WHERE stored_at_ts < ?",
+                    (cutoff,)
+                ).rowcount
+                self._invalidate()
             
-            Result = Query()
-            old_results = self.db.search(Result.stored_at < cutoff_date)
-            
-            if old_results:
-                deleted = self.db.remove(Result.stored_at < cutoff_date)
-                logger.info(f"Cleaned up {len(deleted)} old results (older than {days_old} days)")
-                return len(deleted)
+            if deleted:
+                logger.info(f"Cleaned up {deleted} old results (older than {days_old} days)")
             else:
                 logger.info("No old results to clean up")
-                return 0
+            return deleted
                 
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
@@ -317,16 +677,23 @@ class DataManager:
             True if successful, False otherwise
         """
         try:
-            import shutil
-            
             if backup_path is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_path = self.db_path.parent / f"data_backup_{timestamp}.json"
-            
-            shutil.copy2(self.db_path, backup_path)
+                backup_path = self.db_path.parent / f"data_backup_{timestamp}.db"
+            
+            # SQLite's online backup copies pages from a consistent read
+            # snapshot, including commits still in the WAL and writes made
+            # by other processes sharing the database
+            self.flush()
+            target = sqlite3.connect(str(backup_path))
+            try:
+                with self._lock:
+                    self.conn.backup(target)
+            finally:
+                target.close()
             logger.info(f"Database backed up to: {backup_path}")
             return True
             
         except Exception as e:
             logger.error(f"Error creating backup: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -7,15 +7,117 @@ This module handles the core XML processing logic including:
 - Template management
 """
 
-import json
+import copy
+import functools
+import hashlib
 import logging
+import re
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import orjson
 from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+# Structure scan line kinds, dispatched on the first character of the
+# stripped line; numbered items and code fences are confirmed by a
+# second check
+_SECTION, _BULLET, _NUMBERED, _FENCE = range(1, 5)
+_LINE_KINDS = {
+    '#': _SECTION,
+    '-': _BULLET, '*': _BULLET, '+': _BULLET,
+    '1': _NUMBERED, '2': _NUMBERED, '3': _NUMBERED,
+    '`': _FENCE
+}
+
+# Number of leading lines searched for key: value metadata
+METADATA_LINES = 20
+
+# Content complexity keywords and their weights
+COMPLEXITY_KEYWORDS = {
+    'complex': 1, 'integrate': 1, 'system': 1, 'process': 1,
+    'workflow': 2, 'automation': 2, 'api': 2, 'database': 2,
+    'security': 2, 'performance': 2, 'scalability': 3,
+    'architecture': 2, 'framework': 1, 'algorithm': 2
+}
+
+# Matches every keyword occurrence in one scan; the lookahead lets
+# overlapping keywords each count, as separate str.count calls did
+_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(COMPLEXITY_KEYWORDS) + '))', re.IGNORECASE | re.ASCII
+)
+
+
+# Analysis keys left out of the XML output
+_SKIPPED_ANALYSIS_KEYS = frozenset({"timestamp", "processing_options"})
+
+# Serialized documents kept per processor, keyed on an analysis fingerprint
+XML_CACHE_SIZE = 1024
+
+# Stand-ins for the id and generated attributes in cached documents; the
+# real values are substituted on every hit
+_ID_MARK = f"id-{uuid.uuid4().hex}"
+_TS_MARK = f"ts-{uuid.uuid4().hex}"
+
+# Attribute values that serialize unescaped and can be substituted as-is
+_PLAIN_ATTR_RE = re.compile(r'[\w.:+-]*\Z', re.ASCII)
+
+
+@functools.lru_cache(maxsize=1024)
+def _tag_name(key: str) -> str:
+    """Convert an analysis key such as word_count to an element name (WordCount)"""
+    return key.title().replace("_", "")
+
+
+class _XMLStatsTarget:
+    """lxml parser target that tallies document structure without building elements"""
+    
+    def __init__(self):
+        self.root_tag = None
+        self.namespaces = []
+        self.elements = 0
+        self.attributes = 0
+        self.depth = 0
+        self.max_depth = 0
+    
+    def start_ns(self, prefix, uri):
+        # Only the root element's declarations are reported
+        if self.root_tag is None:
+            self.namespaces.append(prefix or None)
+    
+    def start(self, tag, attrib):
+        if self.root_tag is None:
+            self.root_tag = tag
+        self.elements += 1
+        self.attributes += len(attrib)
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+        self.depth += 1
+    
+    def end(self, tag):
+        self.depth -= 1
+    
+    def comment(self, text):
+        # Comments and processing instructions are child nodes too
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+    
+    def pi(self, target, data=None):
+        self.comment(data)
+    
+    def close(self) -> Dict[str, Any]:
+        return {
+            "root_tag": self.root_tag,
+            "elements": self.elements,
+            "attributes": self.attributes,
+            "depth": self.max_depth,
+            "namespaces": self.namespaces
+        }
+
 
 class XMLProcessor:
     """
@@ -43,9 +145,18 @@ class XMLProcessor:
             'analysis_report': 'analysis-schema.xml'
         }
         
+        # Static element skeleton per template, copied for each output
+        self._proto_cache = self._build_prototypes()
+        
+        # LRU of serialized outputs, see _render
+        self._xml_cache: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._xml_cache_lock = threading.Lock()
+        self.xml_cache_hits = 0
+        
         logger.info(f"XMLProcessor initialized with schemas: {self.schemas_dir}")
     
-    def analyze_input(self, content: str, input_type: str = "text", options: Dict[str, Any] = None) -> Dict[str, Any]:
+    def analyze_input(self, content: str, input_type: str = "text", options: Dict[str, Any] = None,
+                      now_iso: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze input content and extract structured information
         
@@ -53,6 +164,7 @@ class XMLProcessor:
             content: Raw input content to analyze
             input_type: Type of input (text, markdown, json, etc.)
             options: Additional processing options
+            now_iso: Timestamp to record; defaults to the current time
             
         Returns:
             Dictionary containing analysis results
@@ -62,15 +174,19 @@ class XMLProcessor:
         
         logger.info(f"Analyzing {input_type} content ({len(content)} chars)")
         
+        stats, structure, metadata, list_markers = self._scan_content(content)
+        
         analysis = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso or datetime.now().isoformat(),
             "input_type": input_type,
             "content_length": len(content),
-            "word_count": len(content.split()),
-            "basic_stats": self._get_basic_stats(content),
-            "structure": self._analyze_structure(content, input_type),
-            "metadata": self._extract_metadata(content, input_type),
-            "complexity_score": self._calculate_complexity(content, input_type),
+            "word_count": stats["words"],
+            "basic_stats": stats,
+            "structure": structure,
+            "metadata": metadata,
+            "complexity_score": self._calculate_complexity(
+                content, input_type, stats["words"], len(structure["sections"]), list_markers
+            ),
             "processing_options": options
         }
         
@@ -86,7 +202,8 @@ class XMLProcessor:
         return analysis
     
     def generate_xml_output(self, analysis: Dict[str, Any], output_id: str, 
-                          template: str = "default", options: Dict[str, Any] = None) -> str:
+                          template: str = "default", options: Dict[str, Any] = None,
+                          now_iso: Optional[str] = None) -> str:
         """
         Generate XML output based on analysis results
         
@@ -95,6 +212,7 @@ class XMLProcessor:
             output_id: Unique identifier for this output
             template: Template to use for XML generation
             options: Additional generation options
+            now_iso: Generation timestamp; defaults to the current time
             
         Returns:
             XML string formatted according to template
@@ -104,20 +222,114 @@ class XMLProcessor:
         
         logger.info(f"Generating XML output: {output_id}, template: {template}")
         
-        # Create root element based on template
-        if template == "task_packet":
-            root = self._create_task_packet_xml(analysis, output_id, options)
-        elif template == "analysis_report":
-            root = self._create_analysis_report_xml(analysis, output_id, options)
-        else:
-            root = self._create_default_xml(analysis, output_id, options)
-        
         # Convert to string
-        xml_output = etree.tostring(root, pretty_print=True, encoding="unicode")
+        xml_output = self._render(analysis, output_id, template, options, now_iso,
+                                  pretty_print=True, encoding="unicode")
         
-        logger.info(f"XML generation complete: {len(xml_output)} characters")
+        logger.info(f"XML generation complete: {len(xml_output)} characters "
+                    f"(cache hits: {self.xml_cache_hits})")
         return xml_output
     
+    def generate_xml_bytes(self, analysis: Dict[str, Any], output_id: str,
+                           template: str = "default", options: Dict[str, Any] = None,
+                           now_iso: Optional[str] = None) -> bytes:
+        """
+        Generate XML output as an encoded document
+        
+        Serializes straight to UTF-8 with an XML declaration, and only
+        indents when options["pretty"] is set.
+        
+        Args:
+            analysis: Analysis results from analyze_input()
+            output_id: Unique identifier for this output
+            template: Template to use for XML generation
+            options: Additional generation options
+            now_iso: Generation timestamp; defaults to the current time
+            
+        Returns:
+            UTF-8 encoded XML document
+        """
+        if options is None:
+            options = {}
+        
+        logger.info(f"Generating XML document: {output_id}, template: {template}")
+        
+        xml_bytes = self._render(
+            analysis, output_id, template, options, now_iso,
+            pretty_print=bool(options.get("pretty")),
+            encoding="utf-8",
+            xml_declaration=True
+        )
+        
+        logger.info(f"XML generation complete: {len(xml_bytes)} bytes "
+                    f"(cache hits: {self.xml_cache_hits})")
+        return xml_bytes
+    
+    def _render(self, analysis: Dict[str, Any], output_id: str, template: str,
+                options: Dict[str, Any], now_iso: Optional[str], **serialize) -> Any:
+        """
+        Serialize the output for an analysis, reusing earlier documents
+        
+        The document is cached with placeholder id and generated attributes,
+        keyed on the analysis fields that reach the XML, the template and the
+        serialization arguments. A hit only substitutes the two attributes.
+        
+        Args:
+            analysis: Analysis results from analyze_input()
+            output_id: Unique identifier for this output
+            template: Template to use for XML generation
+            options: Additional generation options
+            now_iso: Generation timestamp; defaults to the current time
+            serialize: Keyword arguments for etree.tostring
+            
+        Returns:
+            The document as returned by etree.tostring
+        """
+        now_iso = now_iso or datetime.now().isoformat()
+        key = None
+        if _PLAIN_ATTR_RE.match(output_id) and _PLAIN_ATTR_RE.match(now_iso):
+            try:
+                fields = {k: v for k, v in analysis.items() if k not in _SKIPPED_ANALYSIS_KEYS}
+                key = hashlib.blake2b(
+                    orjson.dumps([template, sorted(serialize.items()), fields],
+                                 option=orjson.OPT_NON_STR_KEYS),
+                    digest_size=16
+                ).digest()
+            except TypeError:
+                pass
+        
+        if key is None:
+            root = self._build_output(analysis, output_id, template, options, now_iso)
+            return etree.tostring(root, **serialize)
+        
+        with self._xml_cache_lock:
+            document = self._xml_cache.get(key)
+            if document is not None:
+                self._xml_cache.move_to_end(key)
+                self.xml_cache_hits += 1
+        
+        if document is None:
+            root = self._build_output(analysis, _ID_MARK, template, options, _TS_MARK)
+            document = etree.tostring(root, **serialize)
+            with self._xml_cache_lock:
+                self._xml_cache[key] = document
+                if len(self._xml_cache) > XML_CACHE_SIZE:
+                    self._xml_cache.popitem(last=False)
+        
+        if isinstance(document, bytes):
+            return document.replace(_ID_MARK.encode(), output_id.encode(), 1).replace(
+                _TS_MARK.encode(), now_iso.encode(), 1)
+        return document.replace(_ID_MARK, output_id, 1).replace(_TS_MARK, now_iso, 1)
+    
+    def _build_output(self, analysis: Dict[str, Any], output_id: str, template: str,
+                      options: Dict[str, Any], now_iso: Optional[str] = None) -> etree.Element:
+        """Create the root element for the requested template"""
+        if template == "task_packet":
+            return self._create_task_packet_xml(analysis, output_id, options, now_iso)
+        elif template == "analysis_report":
+            return self._create_analysis_report_xml(analysis, output_id, options, now_iso)
+        return self._create_default_xml(analysis, output_id, options, now_iso)
+    
     def list_templates(self) -> List[Dict[str, str]]:
         """
         List available XML templates
@@ -136,66 +348,81 @@ class XMLProcessor:
         
         return template_list
     
-    def _get_basic_stats(self, content: str) -> Dict[str, int]:
-        """Get basic statistics about the content"""
-        lines = content.split('\n')
-        paragraphs = [p for p in content.split('\n\n') if p.strip()]
+    def _scan_content(self, content: str) -> Tuple[Dict[str, int], Dict[str, List[str]], Dict[str, str], int]:
+        """
+        Collect basic statistics, structure and metadata in a single pass over the lines
         
-        return {
-            "lines": len(lines),
-            "characters": len(content),
-            "characters_no_spaces": len(content.replace(' ', '')),
-            "words": len(content.split()),
-            "paragraphs": len(paragraphs),
-            "sentences": content.count('.') + content.count('!') + content.count('?')
-        }
-    
-    def _analyze_structure(self, content: str, input_type: str) -> Dict[str, List[str]]:
-        """Analyze content structure based on input type"""
-        structure = {"sections": [], "lists": [], "code_blocks": [], "links": []}
+        Args:
+            content: Raw input content to scan
+            
+        Returns:
+            Tuple of (basic stats, structure, metadata, count of -/*/+ list items)
+        """
+        sections, lists, code_blocks, links = [], [], [], []
+        structure = {"sections": sections, "lists": lists, "code_blocks": code_blocks, "links": links}
+        metadata = {}
+        words = 0
+        paragraphs = 0
+        paragraph_start = 0
+        paragraph_has_text = False
+        list_markers = 0
         
         lines = content.split('\n')
+        last_index = len(lines) - 1
         
-        for line in lines:
-            line = line.strip()
+        for index, raw_line in enumerate(lines):
+            line = raw_line.strip()
+            words += len(raw_line.split())
             
-            # Headers/sections
-            if line.startswith('#'):
-                structure["sections"].append(line)
-            elif line.startswith(('-', '*', '+', '1.', '2.', '3.')):
-                structure["lists"].append(line)
-            elif line.startswith('```') or line.startswith('    '):
-                structure["code_blocks"].append(line)
-            elif '[' in line and '](' in line:
-                structure["links"].append(line)
-        
-        return structure
-    
-    def _extract_metadata(self, content: str, input_type: str) -> Dict[str, str]:
-        """Extract metadata from content"""
-        metadata = {}
+            # Paragraphs break on empty lines the way content.split('\n\n') would
+            if not raw_line and paragraph_start < index < last_index:
+                paragraphs += paragraph_has_text
+                paragraph_start = index + 1
+                paragraph_has_text = False
+            elif line:
+                paragraph_has_text = True
+            
+            # Headers/sections, lists (-, *, +, 1. to 3.), code fences, links
+            kind = _LINE_KINDS.get(line[:1])
+            if kind == _SECTION:
+                sections.append(line)
+            elif kind == _BULLET:
+                lists.append(line)
+                list_markers += 1
+            elif kind == _NUMBERED and line[1:2] == '.':
+                lists.append(line)
+            elif kind == _FENCE and line.startswith('```'):
+                code_blocks.append(line)
+            elif '](' in line and '[' in line:
+                links.append(line)
+            
+            # Look for key-value pairs in the first few lines
+            if index < METADATA_LINES and not line.startswith('#'):
+                pos = raw_line.find(':', 0, 50)
+                if pos != -1:
+                    value = raw_line[pos + 1:].strip()
+                    if value and len(value) < 200:
+                        metadata[raw_line[:pos].strip().lower().replace(' ', '_')] = value
         
-        # Look for key-value pairs in the first few lines
-        lines = content.split('\n')[:20]
+        paragraphs += paragraph_has_text
         
-        for line in lines:
-            if ':' in line and not line.strip().startswith('#'):
-                parts = line.split(':', 1)
-                if len(parts) == 2 and len(parts[0]) < 50:
-                    key = parts[0].strip().lower().replace(' ', '_')
-                    value = parts[1].strip()
-                    if value and len(value) < 200:
-                        metadata[key] = value
+        stats = {
+            "lines": len(lines),
+            "characters": len(content),
+            "characters_no_spaces": len(content) - content.count(' '),
+            "words": words,
+            "paragraphs": paragraphs,
+            "sentences": content.count('.') + content.count('!') + content.count('?')
+        }
         
-        return metadata
+        return stats, structure, metadata, list_markers
     
-    def _calculate_complexity(self, content: str, input_type: str) -> int:
+    def _calculate_complexity(self, content: str, input_type: str, word_count: int,
+                              sections: int, lists: int) -> int:
         """Calculate complexity score based on content analysis"""
         score = 0
-        content_lower = content.lower()
         
         # Length-based complexity
-        word_count = len(content.split())
         if word_count > 1000:
             score += 3
         elif word_count > 500:
@@ -204,23 +431,12 @@ class XMLProcessor:
             score += 1
         
         # Structure complexity
-        lines = content.split('\n')
-        sections = len([line for line in lines if line.strip().startswith('#')])
-        lists = len([line for line in lines if line.strip().startswith(('-', '*', '+'))])
-        
         score += min(sections, 5)  # Cap section contribution
         score += min(lists // 3, 3)  # Every 3 list items adds 1 point
         
         # Content complexity keywords
-        complexity_keywords = {
-            'complex': 1, 'integrate': 1, 'system': 1, 'process': 1,
-            'workflow': 2, 'automation': 2, 'api': 2, 'database': 2,
-            'security': 2, 'performance': 2, 'scalability': 3,
-            'architecture': 2, 'framework': 1, 'algorithm': 2
-        }
-        
-        for keyword, weight in complexity_keywords.items():
-            score += content_lower.count(keyword) * weight
+        for keyword in _KEYWORD_RE.findall(content):
+            score += COMPLEXITY_KEYWORDS[keyword.lower()]
         
         return min(score, 20)  # Cap at 20
     
@@ -247,17 +463,18 @@ class XMLProcessor:
     def _analyze_json(self, content: str) -> Dict[str, Any]:
         """Analyze JSON structure"""
         try:
-            data = json.loads(content)
+            data = orjson.loads(content)
+            depth, has_arrays, has_objects = self._scan_json(data)
             return {
                 "valid": True,
                 "type": type(data).__name__,
                 "keys": list(data.keys()) if isinstance(data, dict) else None,
                 "length": len(data) if isinstance(data, (list, dict)) else None,
-                "depth": self._get_json_depth(data),
-                "has_arrays": self._has_arrays(data),
-                "has_objects": self._has_objects(data)
+                "depth": depth,
+                "has_arrays": has_arrays,
+                "has_objects": has_objects
             }
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             return {
                 "valid": False,
                 "error": str(e)
@@ -266,121 +483,143 @@ class XMLProcessor:
     def _analyze_xml(self, content: str) -> Dict[str, Any]:
         """Analyze XML structure"""
         try:
-            root = etree.fromstring(content)
-            return {
-                "valid": True,
-                "root_tag": root.tag,
-                "elements": len(root.xpath('//*')),
-                "attributes": len(root.xpath('//@*')),
-                "depth": self._get_xml_depth(root),
-                "namespaces": list(root.nsmap.keys()) if root.nsmap else []
-            }
+            # Parse events go straight to a counting target, so no element
+            # tree is built and memory does not grow with document size
+            parser = etree.XMLParser(target=_XMLStatsTarget())
+            parser.feed(content.encode('utf-8'))
+            stats = parser.close()
+            return {"valid": True, **stats}
         except etree.XMLSyntaxError as e:
             return {
                 "valid": False,
                 "error": str(e)
             }
     
-    def _get_json_depth(self, obj, depth=0):
-        """Calculate JSON nesting depth"""
-        if isinstance(obj, dict):
-            return max([self._get_json_depth(v, depth + 1) for v in obj.values()], default=depth)
-        elif isinstance(obj, list):
-            return max([self._get_json_depth(item, depth + 1) for item in obj], default=depth)
-        return depth
-    
-    def _get_xml_depth(self, element, depth=0):
-        """Calculate XML nesting depth"""
-        if len(element) == 0:
-            return depth
-        return max([self._get_xml_depth(child, depth + 1) for child in element])
-    
-    def _has_arrays(self, obj):
-        """Check if JSON contains arrays"""
-        if isinstance(obj, list):
-            return True
-        elif isinstance(obj, dict):
-            return any(self._has_arrays(v) for v in obj.values())
-        return False
-    
-    def _has_objects(self, obj):
-        """Check if JSON contains objects"""
-        if isinstance(obj, dict):
-            return True
-        elif isinstance(obj, list):
-            return any(self._has_objects(item) for item in obj)
-        return False
-    
-    def _create_default_xml(self, analysis: Dict[str, Any], output_id: str, options: Dict[str, Any]) -> etree.Element:
-        """Create default XML output"""
-        root = etree.Element("Output")
+    def _scan_json(self, obj) -> Tuple[int, bool, bool]:
+        """
+        Walk parsed JSON once, collecting nesting depth and container types
+        
+        Args:
+            obj: Parsed JSON value
+            
+        Returns:
+            Tuple of (depth, has_arrays, has_objects)
+        """
+        # Explicit stack instead of recursion: deep documents cannot hit the
+        # recursion limit and no per-node lists are built
+        max_depth = 0
+        has_arrays = False
+        has_objects = False
+        stack = [(obj, 0)]
+        
+        while stack:
+            node, depth = stack.pop()
+            if depth > max_depth:
+                max_depth = depth
+            if isinstance(node, dict):
+                has_objects = True
+                stack.extend((value, depth + 1) for value in node.values())
+            elif isinstance(node, list):
+                has_arrays = True
+                stack.extend((item, depth + 1) for item in node)
+        
+        return max_depth, has_arrays, has_objects
+    
+    def _build_prototypes(self) -> Dict[str, etree.Element]:
+        """Build the fixed element skeleton of each template"""
+        default = etree.Element("Output", id="", generated="", template="default")
+        metadata = etree.SubElement(default, "Metadata")
+        etree.SubElement(metadata, "InputType")
+        etree.SubElement(metadata, "WordCount")
+        etree.SubElement(metadata, "ComplexityScore")
+        etree.SubElement(default, "Analysis")
+        
+        task_packet = etree.Element("TaskPacket", id="", generated="", template="task_packet")
+        metadata = etree.SubElement(task_packet, "Metadata")
+        etree.SubElement(metadata, "ComplexityScore")
+        etree.SubElement(metadata, "EstimatedEffort")
+        etree.SubElement(task_packet, "Tasks")
+        
+        analysis_report = etree.Element("AnalysisReport", id="", generated="", template="analysis_report")
+        etree.SubElement(analysis_report, "Summary")
+        etree.SubElement(analysis_report, "DetailedAnalysis")
+        
+        return {
+            "default": default,
+            "task_packet": task_packet,
+            "analysis_report": analysis_report
+        }
+    
+    def _new_root(self, template: str, output_id: str, now_iso: Optional[str] = None) -> etree.Element:
+        """Copy a template's skeleton and stamp it with the output ID and time"""
+        root = copy.deepcopy(self._proto_cache[template])
         root.set("id", output_id)
-        root.set("generated", datetime.now().isoformat())
-        root.set("template", "default")
+        root.set("generated", now_iso or datetime.now().isoformat())
+        return root
+    
+    def _create_default_xml(self, analysis: Dict[str, Any], output_id: str, options: Dict[str, Any],
+                            now_iso: Optional[str] = None) -> etree.Element:
+        """Create default XML output"""
+        root = self._new_root("default", output_id, now_iso)
+        metadata, analysis_elem = root
         
         # Metadata
-        metadata = etree.SubElement(root, "Metadata")
-        etree.SubElement(metadata, "InputType").text = analysis.get("input_type", "unknown")
-        etree.SubElement(metadata, "WordCount").text = str(analysis.get("word_count", 0))
-        etree.SubElement(metadata, "ComplexityScore").text = str(analysis.get("complexity_score", 0))
+        input_type, word_count, complexity_score = metadata
+        input_type.text = analysis.get("input_type", "unknown")
+        word_count.text = str(analysis.get("word_count", 0))
+        complexity_score.text = str(analysis.get("complexity_score", 0))
         
         # Analysis
-        analysis_elem = etree.SubElement(root, "Analysis")
         self._add_analysis_data(analysis_elem, analysis)
         
         return root
     
-    def _create_task_packet_xml(self, analysis: Dict[str, Any], output_id: str, options: Dict[str, Any]) -> etree.Element:
+    def _create_task_packet_xml(self, analysis: Dict[str, Any], output_id: str, options: Dict[str, Any],
+                                now_iso: Optional[str] = None) -> etree.Element:
         """Create task packet XML output"""
-        root = etree.Element("TaskPacket")
-        root.set("id", output_id)
-        root.set("generated", datetime.now().isoformat())
-        root.set("template", "task_packet")
+        root = self._new_root("task_packet", output_id, now_iso)
+        metadata, tasks = root
         
         # Metadata
-        metadata = etree.SubElement(root, "Metadata")
-        etree.SubElement(metadata, "ComplexityScore").text = str(analysis.get("complexity_score", 0))
-        etree.SubElement(metadata, "EstimatedEffort").text = self._estimate_effort(analysis)
+        complexity_score, estimated_effort = metadata
+        complexity_score.text = str(analysis.get("complexity_score", 0))
+        estimated_effort.text = self._estimate_effort(analysis)
         
         # Tasks (generated from analysis)
-        tasks = etree.SubElement(root, "Tasks")
         self._generate_tasks(tasks, analysis)
         
         return root
     
-    def _create_analysis_report_xml(self, analysis: Dict[str, Any], output_id: str, options: Dict[str, Any]) -> etree.Element:
+    def _create_analysis_report_xml(self, analysis: Dict[str, Any], output_id: str, options: Dict[str, Any],
+                                    now_iso: Optional[str] = None) -> etree.Element:
         """Create analysis report XML output"""
-        root = etree.Element("AnalysisReport")
-        root.set("id", output_id)
-        root.set("generated", datetime.now().isoformat())
-        root.set("template", "analysis_report")
+        root = self._new_root("analysis_report", output_id, now_iso)
+        summary, details = root
         
         # Summary
-        summary = etree.SubElement(root, "Summary")
         self._add_analysis_summary(summary, analysis)
         
         # Detailed analysis
-        details = etree.SubElement(root, "DetailedAnalysis")
         self._add_analysis_data(details, analysis)
         
         return root
     
     def _add_analysis_data(self, parent: etree.Element, analysis: Dict[str, Any]):
         """Add analysis data to XML element"""
+        sub_element = etree.SubElement
+        
         for key, value in analysis.items():
-            if key in ["timestamp", "processing_options"]:
+            if key in _SKIPPED_ANALYSIS_KEYS:
                 continue
                 
-            elem = etree.SubElement(parent, key.title().replace("_", ""))
+            elem = sub_element(parent, _tag_name(key))
             
             if isinstance(value, dict):
                 for sub_key, sub_value in value.items():
-                    sub_elem = etree.SubElement(elem, sub_key.title().replace("_", ""))
-                    sub_elem.text = str(sub_value)
+                    sub_element(elem, _tag_name(sub_key)).text = str(sub_value)
             elif isinstance(value, list):
                 for item in value[:10]:  # Limit to 10 items
-                    item_elem = etree.SubElement(elem, "Item")
-                    item_elem.text = str(item)
+                    sub_element(elem, "Item").text = str(item)
             else:
                 elem.text = str(value)
     
@@ -444,4 +683,57 @@ class XMLProcessor:
             "task_packet": "Structured task breakdown with effort estimates",
             "analysis_report": "Detailed analysis report with summary"
         }
-        return descriptions.get(template_name, "Custom template")
\ No newline at end of file
+        return descriptions.get(template_name, "Custom template")
+
+
+# Processor used by run_pipeline and run_analysis, created once per worker
+# process
+_pipeline_processor: Optional[XMLProcessor] = None
+
+
+def _worker_processor() -> XMLProcessor:
+    """Return this worker process's processor, creating it on first use"""
+    global _pipeline_processor
+    if _pipeline_processor is None:
+        _pipeline_processor = XMLProcessor()
+    return _pipeline_processor
+
+
+def run_pipeline(content: str, input_type: str, output_id: str,
+                 template: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Analyze content and generate its XML output in one call
+    
+    Defined at module level so it can be submitted to a process pool.
+    
+    Args:
+        content: Raw input content to analyze
+        input_type: Type of input (text, markdown, json, etc.)
+        output_id: Unique identifier for the output
+        template: Template to use for XML generation
+        options: Additional processing options
+    
+    Returns:
+        Dictionary with the analysis and the XML output
+    """
+    processor = _worker_processor()
+    analysis = processor.analyze_input(content, input_type, options)
+    xml_output = processor.generate_xml_output(analysis, output_id, template, options)
+    return {'analysis': analysis, 'xml_output': xml_output}
+
+
+def run_analysis(content: str, input_type: str, options: Dict[str, Any],
+                 now_iso: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze content on a process pool worker
+    
+    Args:
+        content: Raw input content to analyze
+        input_type: Type of input (text, markdown, json, etc.)
+        options: Additional analysis options
+        now_iso: Analysis timestamp; defaults to the current time
+    
+    Returns:
+        Dictionary with analysis results
+    """
+    return _worker_processor().analyze_input(content, input_type, options, now_iso)
\ No newline at end of file
@@ -6,22 +6,91 @@ These endpoints are called by the MCP server and can also be used by web UIs.
 """
 
 import logging
+import multiprocessing
+import os
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from flask import Blueprint, request, jsonify, current_app
-from app.processors.xml_processor import XMLProcessor
+import orjson
+from flask import Blueprint, Response, request, jsonify, current_app, url_for, g
+from app.processors.xml_processor import XMLProcessor, run_analysis, run_pipeline
 from app.processors.data_manager import DataManager
 
 # Create blueprint
 api_bp = Blueprint('api', __name__)
 
+# Processes serving the app; run.py and gunicorn.conf.py export the resolved
+# worker count, and the development server is a single process
+SERVER_WORKERS = int(os.getenv('GUNICORN_WORKERS', 1))
+
+# Queue result writes on a background thread when WRITE_BEHIND=true. Queued
+# results are only visible to the process that queued them, so with several
+# workers every write stays synchronous and a processing_id can be read back
+# from any worker at once.
+WRITE_BEHIND = os.getenv('WRITE_BEHIND', 'False').lower() == 'true' and SERVER_WORKERS == 1
+
 # Initialize processors
 xml_processor = XMLProcessor()
-data_manager = DataManager()
+data_manager = DataManager(write_behind=WRITE_BEHIND)
 
 logger = logging.getLogger(__name__)
 
 
+@api_bp.before_request
+def _stamp():
+    """Take one timestamp per request for every record and document it produces"""
+    g.now_iso = datetime.now().isoformat()
+
+
+def _wants_xml() -> bool:
+    """Check whether the client asked for the XML document instead of JSON"""
+    if request.args.get('format') == 'xml':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', 'application/xml'])
+    return best == 'application/xml'
+
+# Pool size per server process, so all workers together use about one
+# pool process per core
+PROCESS_POOL_WORKERS = int(os.getenv(
+    'PROCESS_POOL_WORKERS', max(1, (os.cpu_count() or 1) // SERVER_WORKERS)
+))
+
+# Total content characters above which a /batch of analyses is spread over
+# the process pool; smaller batches are analyzed inline, since sending them
+# to worker processes costs more than the analysis itself
+BATCH_POOL_MIN_CHARS = int(os.getenv('BATCH_POOL_MIN_CHARS', 200_000))
+
+# Process pool for asynchronous /process jobs, started on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it if needed"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Pool processes start from a clean forkserver rather than a
+            # fork of this process, which holds threads, locks and an open
+            # SQLite connection. Platforms without forkserver (Windows)
+            # already default to spawn.
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                mp_context = multiprocessing.get_context('forkserver')
+            else:
+                mp_context = multiprocessing.get_context()
+            _executor = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=mp_context
+            )
+        return _executor
+
+
+# Serialized GET /templates body; the template set is fixed for the
+# lifetime of the process, so it is built on first request and reused
+_templates_body = None
+
+
 @api_bp.route('/analyze', methods=['POST'])
 def analyze_input():
     """
@@ -46,43 +115,155 @@ def analyze_input():
         if not request.is_json:
             return jsonify({'error': 'Content-Type must be application/json'}), 400
         
-        data = request.get_json()
-        
-        # Validate required fields
+        body, status = _analyze(request.get_json())
+        return jsonify(body), status
+    
+    except Exception as e:
+        logger.error(f"Error in analyze_input: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def _analyze(data: dict) -> tuple:
+    """Analyze and store one /analyze payload, returning (body, status)"""
+    # Validate required fields
+    content = data.get('content')
+    if not content:
+        return {'error': 'content field is required'}, 400
+    
+    input_type = data.get('input_type', 'text')
+    options = data.get('options', {})
+    
+    # Perform analysis
+    analysis = xml_processor.analyze_input(content, input_type, options, g.now_iso)
+    
+    return _store_analysis(analysis, input_type)
+
+
+def _store_analysis(analysis: dict, input_type: str) -> tuple:
+    """Store a finished analysis under a new processing ID, returning (body, status)"""
+    # Generate processing ID
+    processing_id = str(uuid.uuid4())
+    
+    logger.info(f"Analyzed input: {processing_id}, type: {input_type}")
+    
+    # Store result
+    result_data = {
+        'processing_id': processing_id,
+        'analysis': analysis,
+        'input_type': input_type,
+        'timestamp': g.now_iso,
+        'status': 'completed'
+    }
+    
+    data_manager.store_result_async(processing_id, result_data)
+    
+    return {
+        'success': True,
+        'analysis': analysis,
+        'processing_id': processing_id
+    }, 200
+
+
+def _analyze_batch(items: list) -> list:
+    """
+    Answer several /analyze payloads, returning (body, status) for each
+    
+    Batches with more than BATCH_POOL_MIN_CHARS of content run in parallel
+    on the process pool, so a burst of large analyses is not serialized on
+    the one request thread.
+    """
+    size = sum(len(data['content']) for data in items if isinstance(data.get('content'), str))
+    if len(items) == 1 or size <= BATCH_POOL_MIN_CHARS:
+        answers = []
+        for data in items:
+            try:
+                answers.append(_analyze(data))
+            except Exception as e:
+                answers.append(_batch_error(e))
+        return answers
+    
+    answers = [None] * len(items)
+    jobs = []
+    executor = _get_executor()
+    for index, data in enumerate(items):
         content = data.get('content')
         if not content:
-            return jsonify({'error': 'content field is required'}), 400
-        
+            answers[index] = ({'error': 'content field is required'}, 400)
+            continue
         input_type = data.get('input_type', 'text')
-        options = data.get('options', {})
-        
-        # Generate processing ID
-        processing_id = str(uuid.uuid4())
+        future = executor.submit(run_analysis, content, input_type, data.get('options', {}), g.now_iso)
+        jobs.append((index, future, input_type))
+    
+    for index, future, input_type in jobs:
+        try:
+            answers[index] = _store_analysis(future.result(), input_type)
+        except Exception as e:
+            answers[index] = _batch_error(e)
+    
+    return answers
+
+
+def _batch_error(error: Exception) -> tuple:
+    """Answer one failed batched request with a 500, as its endpoint would"""
+    logger.error(f"Error in batched request: {error}")
+    return {'success': False, 'error': str(error)}, 500
+
+
+# Endpoints that /batch can run, by name; each handler answers a list of
+# payloads with a (body, status) pair per payload
+_BATCH_HANDLERS = {
+    'analyze': _analyze_batch
+}
+
+
+@api_bp.route('/batch', methods=['POST'])
+def run_batch():
+    """
+    Run several requests for one endpoint in a single round trip
+    
+    Expected JSON payload:
+    {
+        "endpoint": "analyze",
+        "requests": [{...}, {...}]
+    }
+    
+    Returns:
+    {
+        "success": true,
+        "results": [{"status": 200, "body": {...}}, ...]
+    }
+    
+    Each request is answered as its endpoint would answer it alone, in
+    order; one failing request does not fail the others.
+    """
+    try:
+        if not request.is_json:
+            return jsonify({'error': 'Content-Type must be application/json'}), 400
         
-        logger.info(f"Analyzing input: {processing_id}, type: {input_type}")
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
         
-        # Perform analysis
-        analysis = xml_processor.analyze_input(content, input_type, options)
+        handler = _BATCH_HANDLERS.get(data.get('endpoint'))
+        if handler is None:
+            return jsonify({'error': f"endpoint must be one of: {', '.join(_BATCH_HANDLERS)}"}), 400
         
-        # Store result
-        result_data = {
-            'processing_id': processing_id,
-            'analysis': analysis,
-            'input_type': input_type,
-            'timestamp': datetime.now().isoformat(),
-            'status': 'completed'
-        }
+        items = data.get('requests')
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return jsonify({'error': 'requests must be a list of objects'}), 400
         
-        data_manager.store_result(processing_id, result_data)
+        results = [{'status': status, 'body': body} for body, status in handler(items)]
         
         return jsonify({
             'success': True,
-            'analysis': analysis,
-            'processing_id': processing_id
+            'results': results
         }), 200
         
     except Exception as e:
-        logger.error(f"Error in analyze_input: {e}")
+        logger.error(f"Error in run_batch: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -108,6 +289,9 @@ def generate_xml():
         "xml_output": "xml string",
         "output_id": "unique-id"
     }
+    
+    With ?format=xml or "Accept: application/xml" the XML document itself
+    is returned, with the output ID in the X-Output-ID header.
     """
     try:
         if not request.is_json:
@@ -127,7 +311,12 @@ def generate_xml():
         logger.info(f"Generating XML: {output_id}, template: {template}")
         
         # Generate XML
-        xml_output = xml_processor.generate_xml_output(analysis, output_id, template, options)
+        wants_xml = _wants_xml()
+        if wants_xml:
+            xml_bytes = xml_processor.generate_xml_bytes(analysis, output_id, template, options, g.now_iso)
+            xml_output = xml_bytes.decode('utf-8')
+        else:
+            xml_output = xml_processor.generate_xml_output(analysis, output_id, template, options, g.now_iso)
         
         # Store result
         result_data = {
@@ -135,11 +324,15 @@ def generate_xml():
             'xml_output': xml_output,
             'analysis': analysis,
             'template': template,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': g.now_iso,
             'status': 'completed'
         }
         
-        data_manager.store_result(output_id, result_data)
+        data_manager.store_result_async(output_id, result_data)
+        
+        if wants_xml:
+            return Response(xml_bytes, mimetype='application/xml',
+                            headers={'X-Output-ID': output_id}), 200
         
         return jsonify({
             'success': True,
@@ -166,7 +359,8 @@ def process_complete():
         "input_type": "text|markdown|json",
         "output_id": "unique-id",
         "template": "template-name",
-        "options": {}
+        "options": {},
+        "async": false
     }
     
     Returns:
@@ -176,6 +370,12 @@ def process_complete():
         "xml_output": "xml string",
         "processing_id": "uuid"
     }
+    
+    With "async": true the job runs in a worker process and the response is
+    202 Accepted with a Location header pointing at /api/status/<processing_id>.
+    
+    With ?format=xml or "Accept: application/xml" the XML document itself
+    is returned, with the IDs in the X-Processing-ID and X-Output-ID headers.
     """
     try:
         if not request.is_json:
@@ -195,13 +395,21 @@ def process_complete():
         
         processing_id = str(uuid.uuid4())
         
+        if data.get('async'):
+            return _submit_process_job(processing_id, content, input_type, output_id, template, options)
+        
         logger.info(f"Processing complete workflow: {processing_id}")
         
         # Step 1: Analyze input
-        analysis = xml_processor.analyze_input(content, input_type, options)
+        analysis = xml_processor.analyze_input(content, input_type, options, g.now_iso)
         
         # Step 2: Generate XML
-        xml_output = xml_processor.generate_xml_output(analysis, output_id, template, options)
+        wants_xml = _wants_xml()
+        if wants_xml:
+            xml_bytes = xml_processor.generate_xml_bytes(analysis, output_id, template, options, g.now_iso)
+            xml_output = xml_bytes.decode('utf-8')
+        else:
+            xml_output = xml_processor.generate_xml_output(analysis, output_id, template, options, g.now_iso)
         
         # Store complete result
         result_data = {
@@ -211,11 +419,17 @@ def process_complete():
             'xml_output': xml_output,
             'input_type': input_type,
             'template': template,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': g.now_iso,
             'status': 'completed'
         }
         
-        data_manager.store_result(processing_id, result_data)
+        data_manager.store_result_async(processing_id, result_data)
+        
+        if wants_xml:
+            return Response(xml_bytes, mimetype='application/xml', headers={
+                'X-Processing-ID': processing_id,
+                'X-Output-ID': output_id
+            }), 200
         
         return jsonify({
             'success': True,
@@ -233,6 +447,57 @@ def process_complete():
         }), 500
 
 
+def _submit_process_job(processing_id, content, input_type, output_id, template, options):
+    """Queue a /process job on the process pool and answer 202 Accepted"""
+    logger.info(f"Queueing complete workflow: {processing_id}")
+    
+    record = {
+        'processing_id': processing_id,
+        'output_id': output_id,
+        'input_type': input_type,
+        'template': template
+    }
+    data_manager.store_result(processing_id, {
+        **record,
+        'timestamp': g.now_iso,
+        'status': 'processing'
+    })
+    
+    def store_outcome(future):
+        try:
+            result = future.result()
+            data_manager.store_result(processing_id, {
+                'processing_id': processing_id,
+                'output_id': output_id,
+                'analysis': result['analysis'],
+                'xml_output': result['xml_output'],
+                'input_type': input_type,
+                'template': template,
+                'timestamp': datetime.now().isoformat(),
+                'status': 'completed'
+            })
+        except Exception as e:
+            logger.error(f"Error in queued workflow {processing_id}: {e}")
+            data_manager.store_result(processing_id, {
+                **record,
+                'timestamp': datetime.now().isoformat(),
+                'status': 'failed',
+                'error': str(e)
+            })
+    
+    future = _get_executor().submit(run_pipeline, content, input_type, output_id, template, options)
+    future.add_done_callback(store_outcome)
+    
+    response = jsonify({
+        'success': True,
+        'status': 'processing',
+        'processing_id': processing_id,
+        'output_id': output_id
+    })
+    response.headers['Location'] = url_for('api.get_status', processing_id=processing_id)
+    return response, 202
+
+
 @api_bp.route('/status/<processing_id>', methods=['GET'])
 def get_status(processing_id):
     """
@@ -273,6 +538,9 @@ def list_data():
     """
     List all stored data entries
     
+    Query parameters:
+        stream: When set to 1, stream one summary per line as NDJSON
+    
     Returns:
     {
         "success": true,
@@ -280,6 +548,10 @@ def list_data():
     }
     """
     try:
+        if request.args.get('stream') == '1':
+            rows = (orjson.dumps(row) + b"\n" for row in data_manager.iter_all())
+            return Response(rows, mimetype='application/x-ndjson')
+        
         data_list = data_manager.list_all()
         
         return jsonify({
@@ -296,6 +568,62 @@ def list_data():
         }), 500
 
 
+@api_bp.route('/data/bulk', methods=['POST'])
+def store_data_bulk():
+    """
+    Store several data entries in one write
+    
+    Expected JSON payload:
+    {
+        "results": [{"result_id": "optional-id", ...}, ...]
+    }
+    
+    Returns:
+    {
+        "success": true,
+        "result_ids": [...],
+        "count": 2
+    }
+    """
+    try:
+        if not request.is_json:
+            return jsonify({'error': 'Content-Type must be application/json'}), 400
+        
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        
+        # Validate required fields
+        results = data.get('results')
+        if not isinstance(results, list) or not results:
+            return jsonify({'error': 'results field must be a non-empty list'}), 400
+        if not all(isinstance(result, dict) for result in results):
+            return jsonify({'error': 'each result must be an object'}), 400
+        
+        items = [(result.get('result_id') or str(uuid.uuid4()), result) for result in results]
+        
+        logger.info(f"Storing {len(items)} results in bulk")
+        
+        if not data_manager.store_results_bulk(items):
+            return jsonify({
+                'success': False,
+                'error': 'Failed to store results'
+            }), 500
+        
+        return jsonify({
+            'success': True,
+            'result_ids': [result_id for result_id, _ in items],
+            'count': len(items)
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error in store_data_bulk: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @api_bp.route('/data/<data_id>', methods=['GET'])
 def get_data(data_id):
     """
@@ -373,13 +701,18 @@ def list_templates():
         "templates": [...]
     }
     """
+    global _templates_body
+    
     try:
-        templates = xml_processor.list_templates()
-        
-        return jsonify({
-            'success': True,
-            'templates': templates
-        }), 200
+        if _templates_body is None:
+            _templates_body = orjson.dumps({
+                'success': True,
+                'templates': xml_processor.list_templates()
+            })
+        
+        response = Response(_templates_body, mimetype='application/json')
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+        return response, 200
         
     except Exception as e:
         logger.error(f"Error in list_templates: {e}")
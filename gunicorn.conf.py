@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration for the XML-MCP Template Flask server
+
+Usage:
+    gunicorn -c gunicorn.conf.py
+
+Each worker process opens its own SQLite connection; WAL mode lets them
+read concurrently while one writes.
+"""
+
+import multiprocessing
+import os
+
+# Application
+wsgi_app = "app:create_app()"
+
+# Server socket; FLASK_UDS binds a Unix domain socket instead of TCP
+if os.getenv('FLASK_UDS'):
+    bind = f"unix:{os.getenv('FLASK_UDS')}"
+else:
+    bind = f"{os.getenv('FLASK_HOST', '127.0.0.1')}:{os.getenv('FLASK_PORT', '5001')}"
+
+# One process per core, each serving requests on a small thread pool
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+# Workers size their per-process resources from this
+os.environ['GUNICORN_WORKERS'] = str(workers)
+worker_class = "gthread"
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Keep idle client connections open between requests; matches the MCP
+# server's connection pool so tool calls reuse their connection
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 75))
+
+# Logging
+accesslog = "-"
+loglevel = "info"
@@ -8,14 +8,23 @@ It works in conjunction with the MCP server to provide a dual-server architectur
 Usage:
     python run.py
 
-The server will start on http://localhost:5000 by default.
+The server will start on http://localhost:5000 by default. When gunicorn is
+installed and debug mode is off, the app is served by gunicorn workers
+instead of Flask's development server.
 """
 
 import os
 import logging
+import signal
+import sys
 from flask import Flask
 from app import create_app
 
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,23 +32,74 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+if BaseApplication is not None:
+    class GunicornApplication(BaseApplication):
+        """Embedded gunicorn server for the Flask app"""
+        
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            # Called in each worker, so every process gets its own
+            # processors and database connection
+            return create_app()
+
+
+def _exit_on_sigterm(signum, frame):
+    """Turn SIGTERM into a normal exit so queued result writes are flushed"""
+    sys.exit(0)
+
+
+def run_gunicorn(bind: str):
+    """Serve the app with one gthread worker per CPU core"""
+    options = {
+        'bind': bind,
+        'workers': int(os.getenv('GUNICORN_WORKERS', os.cpu_count() or 1)),
+        'worker_class': 'gthread',
+        'threads': int(os.getenv('GUNICORN_THREADS', 4)),
+        # Hold idle connections open as long as the MCP server's pool does
+        'keepalive': int(os.getenv('GUNICORN_KEEPALIVE', 75))
+    }
+    # Workers size their per-process resources from this
+    os.environ['GUNICORN_WORKERS'] = str(options['workers'])
+    logger.info(f"Starting gunicorn with {options['workers']} workers on {bind}")
+    GunicornApplication(options).run()
+
+
 def main():
     """Main entry point for Flask server"""
-    # Create Flask application
-    app = create_app()
-    
     # Configuration
     host = os.getenv('FLASK_HOST', '127.0.0.1')
     port = int(os.getenv('FLASK_PORT', 5000))
     debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
-    logger.info(f"Starting Flask server on {host}:{port}")
+    # Listen on a Unix domain socket instead of TCP when FLASK_UDS is set
+    uds = os.getenv('FLASK_UDS')
+    bind = f"unix:{uds}" if uds else f"{host}:{port}"
+    
+    if BaseApplication is not None and not debug:
+        run_gunicorn(bind)
+        return
+    
+    # Create Flask application
+    app = create_app()
+    
+    logger.info(f"Starting Flask server on {bind}")
     logger.info(f"Debug mode: {debug}")
     
+    # The development server has no SIGTERM handling of its own, and
+    # server.py stops it with SIGTERM
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    
     # Start the server
     try:
         app.run(
-            host=host,
+            host=f"unix://{uds}" if uds else host,
             port=port,
             debug=debug,
             threaded=True
@@ -49,6 +109,10 @@ def main():
     except Exception as e:
         logger.error(f"Server error: {e}")
         raise
+    finally:
+        # Commit results still queued for write-behind before exiting
+        from app.routes.api import data_manager
+        data_manager.flush()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
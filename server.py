@@ -18,16 +18,17 @@ USAGE:
 """
 
 import asyncio
-import json
+import hashlib
 import logging
 import aiohttp
+import orjson
 import subprocess
 import signal
 import time
 import threading
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from datetime import datetime
 
 # MCP imports
@@ -39,6 +40,11 @@ from mcp.types import (
 )
 import mcp.types as types
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -54,7 +60,25 @@ SERVER_DESCRIPTION = "XML-MCP template server with Flask backend"
 # Flask server configuration
 FLASK_HOST = "127.0.0.1"
 FLASK_PORT = 5001  # Changed from 5000 to avoid macOS Control Center conflict
-FLASK_BASE_URL = f"http://{FLASK_HOST}:{FLASK_PORT}"
+
+# Unix domain socket path (e.g. /tmp/xmlmcp.sock); when set, Flask listens
+# on it instead of FLASK_HOST:FLASK_PORT and the client connects through it
+FLASK_UDS = os.getenv("FLASK_UDS")
+FLASK_BASE_URL = "http://localhost" if FLASK_UDS else f"http://{FLASK_HOST}:{FLASK_PORT}"
+
+# Connection pool for the HTTP backend; keep-alive connections are reused
+# across tool calls
+HTTP_POOL_SIZE = 50
+HTTP_KEEPALIVE_TIMEOUT = 75
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=300, sock_connect=5)
+
+# Seconds to wait after SIGTERM for the Flask server to exit (and commit any
+# queued results) before it is killed
+FLASK_STOP_TIMEOUT = float(os.getenv("FLASK_STOP_TIMEOUT", 5))
+
+# Backend transport: "http" launches run.py and calls it over HTTP, "inproc"
+# serves tool calls from the Flask app inside this process (no REST API)
+BACKEND_MODE = os.getenv("XML_MCP_BACKEND", "http")
 
 # ============================================================================
 # MCP SERVER SETUP
@@ -72,13 +96,14 @@ class FlaskServerManager:
     Manages the Flask server process lifecycle
     """
     
-    def __init__(self, host: str = FLASK_HOST, port: int = FLASK_PORT):
+    def __init__(self, host: str = FLASK_HOST, port: int = FLASK_PORT, uds_path: Optional[str] = FLASK_UDS):
         self.host = host
         self.port = port
+        self.uds_path = uds_path
         self.process = None
         self.base_dir = Path(__file__).parent
         
-    def start_flask_server(self) -> bool:
+    async def start_flask_server(self) -> bool:
         """
         Start the Flask server in a subprocess
         
@@ -86,11 +111,12 @@ class FlaskServerManager:
             True if server started successfully, False otherwise
         """
         try:
-            logger.info(f"Starting Flask server on {self.host}:{self.port}")
+            address = self.uds_path or f"{self.host}:{self.port}"
+            logger.info(f"Starting Flask server on {address}")
             
-            # Check if port is already in use
-            if self._is_port_in_use():
-                logger.info(f"Port {self.port} already in use - Flask server may already be running")
+            # Check if the socket is already in use
+            if await self._can_connect():
+                logger.info(f"{address} already in use - Flask server may already be running")
                 return True
             
             # Start Flask server subprocess - use same Python executable as current process
@@ -104,43 +130,40 @@ class FlaskServerManager:
             logger.info(f"Using Python executable: {python_path}")
             logger.info(f"Flask server command: {' '.join(cmd)}")
             
-            env = {
-                **dict(os.environ),
-                "FLASK_HOST": self.host,
-                "FLASK_PORT": str(self.port),
-                "FLASK_DEBUG": "False"
-            }
+            env = os.environ.copy()
+            env.update(
+                FLASK_HOST=self.host,
+                FLASK_PORT=str(self.port),
+                FLASK_DEBUG="False"
+            )
+            if self.uds_path:
+                env["FLASK_UDS"] = self.uds_path
             
+            # stdout is this server's MCP channel, so Flask must not write to
+            # it; stderr is shared so Flask's logs land next to ours and no
+            # unread pipe can fill up and stall the server. A separate session
+            # keeps terminal signals away from Flask; stop_flask_server
+            # shuts it down.
             self.process = subprocess.Popen(
                 cmd,
                 cwd=self.base_dir,
                 env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stdout=subprocess.DEVNULL,
+                start_new_session=True
             )
             
-            # Wait a moment for server to start
-            time.sleep(2)
-            
-            # Check if process is still running
-            if self.process.poll() is None:
+            # Wait for server to be ready
+            if await self._wait_for_server_ready():
                 logger.info(f"✓ Flask server started (PID: {self.process.pid})")
-                
-                # Wait for server to be ready
-                if self._wait_for_server_ready():
-                    logger.info("✓ Flask server is ready to accept connections")
-                    return True
-                else:
-                    logger.error("Flask server started but not responding")
-                    self.stop_flask_server()
-                    return False
+                logger.info("✓ Flask server is ready to accept connections")
+                return True
+            elif self.process.poll() is None:
+                logger.error("Flask server started but not responding")
+                self.stop_flask_server()
+                return False
             else:
-                # Process exited immediately
-                stdout, stderr = self.process.communicate()
-                logger.error(f"Flask server failed to start:")
-                logger.error(f"STDOUT: {stdout}")
-                logger.error(f"STDERR: {stderr}")
+                # Process exited immediately; its error output is in our stderr
+                logger.error(f"Flask server failed to start (exit code {self.process.returncode})")
                 return False
                 
         except Exception as e:
@@ -154,16 +177,16 @@ class FlaskServerManager:
                 logger.info("Stopping Flask server...")
                 
                 # Try graceful shutdown first
-                self.process.terminate()
+                self._signal_group(signal.SIGTERM)
                 
-                # Wait up to 5 seconds for graceful shutdown
+                # Wait up to FLASK_STOP_TIMEOUT seconds for graceful shutdown
                 try:
-                    self.process.wait(timeout=5)
+                    self.process.wait(timeout=FLASK_STOP_TIMEOUT)
                     logger.info("✓ Flask server stopped gracefully")
                 except subprocess.TimeoutExpired:
                     # Force kill if graceful shutdown failed
                     logger.warning("Force killing Flask server...")
-                    self.process.kill()
+                    self._signal_group(getattr(signal, "SIGKILL", signal.SIGTERM))
                     self.process.wait()
                     logger.info("✓ Flask server force stopped")
                 
@@ -172,43 +195,59 @@ class FlaskServerManager:
             except Exception as e:
                 logger.error(f"Error stopping Flask server: {e}")
     
-    def _is_port_in_use(self) -> bool:
-        """Check if the Flask port is already in use"""
-        import socket
+    def _signal_group(self, signum: int):
+        """Signal the Flask process group: run.py and any gunicorn workers"""
+        if not hasattr(os, "killpg"):
+            # No process groups (Windows); signal the process itself
+            self.process.send_signal(signum)
+            return
         
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(1)
-                result = sock.connect_ex((self.host, self.port))
-                return result == 0
-        except:
+            # start_new_session made the process its group leader, so its
+            # PID is the group ID
+            os.killpg(self.process.pid, signum)
+        except ProcessLookupError:
+            pass
+    
+    async def _can_connect(self, timeout: float = 0.2) -> bool:
+        """Try one connection to the Flask socket (Unix or TCP) without blocking the event loop"""
+        try:
+            if self.uds_path:
+                connect = asyncio.open_unix_connection(self.uds_path)
+            else:
+                connect = asyncio.open_connection(self.host, self.port)
+            _, writer = await asyncio.wait_for(connect, timeout)
+        except (OSError, asyncio.TimeoutError):
             return False
+        
+        writer.close()
+        await writer.wait_closed()
+        return True
     
-    def _wait_for_server_ready(self, timeout: int = 10) -> bool:
+    async def _wait_for_server_ready(self, timeout: int = 10) -> bool:
         """
         Wait for Flask server to be ready to accept connections
         
+        Polls with exponential backoff from 10 ms up to 1 s, and gives up
+        early if the server process exits.
+        
         Args:
             timeout: Maximum time to wait in seconds
             
         Returns:
-            True if server is ready, False if timeout
+            True if server is ready, False if timeout or the process exited
         """
-        import socket
+        deadline = time.monotonic() + timeout
+        delay = 0.01
         
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                    sock.settimeout(1)
-                    result = sock.connect_ex((self.host, self.port))
-                    if result == 0:
-                        return True
-            except:
-                pass
+        while time.monotonic() < deadline:
+            if await self._can_connect():
+                return True
+            if self.process and self.process.poll() is not None:
+                return False
             
-            time.sleep(0.5)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
         
         return False
     
@@ -228,52 +267,173 @@ class FlaskAPIClient:
     Client for communicating with Flask backend server
     """
     
-    def __init__(self, base_url: str = FLASK_BASE_URL):
+    def __init__(self, base_url: str = FLASK_BASE_URL, backend_mode: str = BACKEND_MODE,
+                 uds_path: Optional[str] = FLASK_UDS):
         self.base_url = base_url
+        self.backend_mode = backend_mode
+        self.uds_path = uds_path
         self.session = None
+        self.app_client = None
+    
+        # Calls waiting for the next batch, by endpoint (present while a
+        # request for the endpoint is in flight), and the tasks sending them
+        self._batches: Dict[str, List[tuple]] = {}
+        self._batch_tasks = set()
     
-    async def _get_session(self):
-        """Get or create aiohttp session"""
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
-        return self.session
+        # In-flight request future per request fingerprint, see _single_flight
+        self._in_flight: Dict[bytes, asyncio.Future] = {}
+    
+    async def open(self):
+        """Create the aiohttp session and its connection pool"""
+        if self.uds_path:
+            connector = aiohttp.UnixConnector(
+                path=self.uds_path, limit=HTTP_POOL_SIZE, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+            )
+        else:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_SIZE, limit_per_host=HTTP_POOL_SIZE,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+            )
+        
+        # The backend sets no cookies, so skip the cookie jar bookkeeping
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=HTTP_TIMEOUT,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            json_serialize=lambda obj: orjson.dumps(obj).decode()
+        )
+    
+    def _get_app_client(self):
+        """Get or create a test client for the in-process Flask app"""
+        if self.app_client is None:
+            from app import create_app
+            self.app_client = create_app().test_client(use_cookies=False)
+        return self.app_client
+    
+    async def _request_body(self, method: str, endpoint: str, data: Dict[str, Any] = None) -> bytes:
+        """
+        Send a request to the Flask backend and return the raw response body
+        
+        The body is read once; error responses are logged and turned into an
+        exception without decoding successful payloads twice.
+        """
+        if self.backend_mode == "inproc":
+            # Dispatch to the in-process Flask app on a worker thread
+            client = self._get_app_client()
+            response = await asyncio.to_thread(client.open, endpoint, method=method.upper(), json=data)
+            status, body = response.status_code, response.get_data()
+        else:
+            url = f"{self.base_url}{endpoint}"
+            try:
+                async with self.session.request(method.upper(), url, json=data) as response:
+                    status, body = response.status, await response.read()
+            except aiohttp.ClientError as e:
+                logger.error(f"Failed to connect to Flask server: {e}")
+                raise Exception("Flask server not available. Please start the Flask server first.")
+        
+        if status >= 400:
+            logger.error("Flask API error %s: %r", status, body[:512])
+            try:
+                error = orjson.loads(body).get('error', 'Unknown error')
+            except (orjson.JSONDecodeError, AttributeError):
+                error = 'Unknown error'
+            raise Exception(f"API error: {error}")
+        
+        return body
     
     async def _make_request(self, method: str, endpoint: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """Make HTTP request to Flask server"""
-        url = f"{self.base_url}{endpoint}"
-        session = await self._get_session()
+        return orjson.loads(await self._request_body(method, endpoint, data))
+    
+    async def dispatch(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST to /api/<endpoint>, coalescing concurrent calls
         
+        A call is sent at once when no request for the endpoint is in
+        flight. Calls made while one is in flight are sent together as one
+        /api/batch request when it finishes, and each caller gets its own
+        result back.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        batch = self._batches.get(endpoint)
+        if batch is None:
+            batch = self._batches[endpoint] = []
+            task = loop.create_task(self._send_batches(endpoint))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+        batch.append((data, future))
+        
+        return await future
+    
+    async def _send_batches(self, endpoint: str):
+        """Send the calls waiting for an endpoint, one request at a time, until none are left"""
+        while self._batches[endpoint]:
+            batch = self._batches[endpoint]
+            self._batches[endpoint] = []
+            await self._send_batch(endpoint, batch)
+        del self._batches[endpoint]
+    
+    async def _send_batch(self, endpoint: str, batch: List[tuple]):
+        """Send one batch of calls for an endpoint and resolve their futures"""
         try:
-            if method.upper() == "GET":
-                async with session.get(url) as response:
-                    result = await response.json()
-            elif method.upper() == "POST":
-                async with session.post(url, json=data) as response:
-                    result = await response.json()
-            elif method.upper() == "DELETE":
-                async with session.delete(url) as response:
-                    result = await response.json()
+            if len(batch) == 1:
+                # Nothing to coalesce; use the endpoint itself
+                data, future = batch[0]
+                outcomes = [(200, await self._make_request("POST", f"/api/{endpoint}", data))]
             else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            if response.status >= 400:
-                logger.error(f"Flask API error {response.status}: {result}")
-                raise Exception(f"API error: {result.get('error', 'Unknown error')}")
-            
-            return result
-            
-        except aiohttp.ClientError as e:
-            logger.error(f"Failed to connect to Flask server: {e}")
-            raise Exception("Flask server not available. Please start the Flask server first.")
+                response = await self._make_request("POST", "/api/batch", {
+                    "endpoint": endpoint,
+                    "requests": [data for data, _ in batch]
+                })
+                outcomes = [(item["status"], item["body"]) for item in response["results"]]
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), (status, body) in zip(batch, outcomes):
+            if future.done():
+                continue
+            if status >= 400:
+                logger.error("Flask API error %s: %s", status, body)
+                future.set_exception(Exception(f"API error: {body.get('error', 'Unknown error')}"))
+            else:
+                future.set_result(body)
+    
+    async def _single_flight(self, name: str, data: Dict[str, Any], send: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run send() once for identical concurrent calls and share its result
+        
+        Calls with the same name and data made while a request is in flight
+        await that request. The entry is dropped as soon as it finishes, so
+        later calls always reach the backend; these requests store records,
+        and replaying an old result would skip the write. Only used for
+        requests that store under an ID the caller supplies, so sharing one
+        request never merges records the caller expects to be separate.
+        """
+        key = hashlib.blake2b(orjson.dumps([name, data], option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+        
+        future = self._in_flight.get(key)
+        if future is None:
+            future = self._in_flight[key] = asyncio.ensure_future(send())
+            future.add_done_callback(lambda done: self._in_flight.pop(key, None))
+        
+        # Shielded so one caller giving up does not cancel the shared request
+        return await asyncio.shield(future)
     
     async def analyze_input(self, content: str, input_type: str = "text", options: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Call Flask /api/analyze endpoint"""
+        """Call Flask /api/analyze endpoint, batched with concurrent calls"""
         data = {
             "content": content,
             "input_type": input_type,
             "options": options or {}
         }
-        return await self._make_request("POST", "/api/analyze", data)
+        # Not shared with identical calls: each analysis is stored under its
+        # own new processing ID
+        return await self.dispatch("analyze", data)
     
     async def generate_xml(self, analysis: Dict[str, Any], output_id: str, template: str = "default", options: Dict[str, Any] = None) -> Dict[str, Any]:
         """Call Flask /api/generate endpoint"""
@@ -283,7 +443,21 @@ class FlaskAPIClient:
             "template": template,
             "options": options or {}
         }
-        return await self._make_request("POST", "/api/generate", data)
+        return await self._single_flight(
+            "generate", data, lambda: self._make_request("POST", "/api/generate", data)
+        )
+    
+    async def generate_xml_raw(self, analysis: Dict[str, Any], output_id: str, template: str = "default", options: Dict[str, Any] = None) -> bytes:
+        """Call Flask /api/generate endpoint for the XML document itself"""
+        data = {
+            "analysis": analysis,
+            "output_id": output_id,
+            "template": template,
+            "options": options or {}
+        }
+        return await self._single_flight(
+            "generate_xml_raw", data, lambda: self._request_body("POST", "/api/generate?format=xml", data)
+        )
     
     async def process_complete(self, content: str, output_id: str, input_type: str = "text", template: str = "default", options: Dict[str, Any] = None) -> Dict[str, Any]:
         """Call Flask /api/process endpoint"""
@@ -341,261 +515,268 @@ flask_manager = FlaskServerManager()
 flask_client = FlaskAPIClient()
 
 
-@server.list_tools()
-async def handle_list_tools() -> List[types.Tool]:
-    """Define available MCP tools"""
-    return [
-        types.Tool(
-                name="analyze_input",
-                description="Analyze input content and extract information",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "content": {
-                            "type": "string",
-                            "description": "Content to analyze"
-                        },
-                        "input_type": {
-                            "type": "string",
-                            "description": "Type of input (text, markdown, json, etc.)",
-                            "default": "text"
-                        }
-                    },
-                    "required": ["content"]
+# Tool definitions are static, so the list is built once at import
+_TOOL_LIST: List[types.Tool] = [
+    types.Tool(
+        name="analyze_input",
+        description="Analyze input content and extract information",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "content": {
+                    "type": "string",
+                    "description": "Content to analyze"
+                },
+                "input_type": {
+                    "type": "string",
+                    "description": "Type of input (text, markdown, json, etc.)",
+                    "default": "text"
                 }
-            ),
-            types.Tool(
-                name="generate_xml",
-                description="Generate XML output from analysis results",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "analysis": {
-                            "type": "object",
-                            "description": "Analysis results"
-                        },
-                        "output_id": {
-                            "type": "string",
-                            "description": "Unique identifier for output"
-                        },
-                        "template": {
-                            "type": "string",
-                            "description": "XML template to use (default, task_packet, analysis_report)",
-                            "default": "default"
-                        },
-                        "options": {
-                            "type": "object",
-                            "description": "Additional generation options",
-                            "default": {}
-                        }
-                    },
-                    "required": ["analysis", "output_id"]
-                }
-            ),
-            types.Tool(
-                name="process_input",
-                description="Complete workflow: analyze input and generate XML",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "content": {
-                            "type": "string",
-                            "description": "Content to process"
-                        },
-                        "input_type": {
-                            "type": "string",
-                            "description": "Type of input",
-                            "default": "text"
-                        },
-                        "output_id": {
-                            "type": "string",
-                            "description": "Unique identifier for output"
-                        },
-                        "template": {
-                            "type": "string",
-                            "description": "XML template to use",
-                            "default": "default"
-                        },
-                        "options": {
-                            "type": "object",
-                            "description": "Processing options",
-                            "default": {}
-                        }
-                    },
-                    "required": ["content", "output_id"]
-                }
-            ),
-            types.Tool(
-                name="get_status",
-                description="Get processing status by ID",
-                inputSchema={
+            },
+            "required": ["content"]
+        }
+    ),
+    types.Tool(
+        name="generate_xml",
+        description="Generate XML output from analysis results",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "analysis": {
                     "type": "object",
-                    "properties": {
-                        "processing_id": {"type": "string"}
-                    },
-                    "required": ["processing_id"]
-                }
-            ),
-            types.Tool(
-                name="list_data",
-                description="List all saved data entries",
-                inputSchema={"type": "object", "properties": {}}
-            ),
-            types.Tool(
-                name="get_data",
-                description="Get data by ID",
-                inputSchema={
+                    "description": "Analysis results"
+                },
+                "output_id": {
+                    "type": "string",
+                    "description": "Unique identifier for output"
+                },
+                "template": {
+                    "type": "string",
+                    "description": "XML template to use (default, task_packet, analysis_report)",
+                    "default": "default"
+                },
+                "options": {
                     "type": "object",
-                    "properties": {
-                        "data_id": {"type": "string"}
-                    },
-                    "required": ["data_id"]
+                    "description": "Additional generation options",
+                    "default": {}
                 }
-            ),
-            types.Tool(
-                name="delete_data",
-                description="Delete data by ID",
-                inputSchema={
+            },
+            "required": ["analysis", "output_id"]
+        }
+    ),
+    types.Tool(
+        name="process_input",
+        description="Complete workflow: analyze input and generate XML",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "content": {
+                    "type": "string",
+                    "description": "Content to process"
+                },
+                "input_type": {
+                    "type": "string",
+                    "description": "Type of input",
+                    "default": "text"
+                },
+                "output_id": {
+                    "type": "string",
+                    "description": "Unique identifier for output"
+                },
+                "template": {
+                    "type": "string",
+                    "description": "XML template to use",
+                    "default": "default"
+                },
+                "options": {
                     "type": "object",
-                    "properties": {
-                        "data_id": {"type": "string"}
-                    },
-                    "required": ["data_id"]
+                    "description": "Processing options",
+                    "default": {}
+                },
+                "xml_as_text": {
+                    "type": "boolean",
+                    "description": "Return the XML document as its own text item, before the JSON result without it",
+                    "default": False
                 }
-            ),
-            types.Tool(
-                name="list_templates",
-                description="List available XML templates",
-                inputSchema={"type": "object", "properties": {}}
-            ),
-            types.Tool(
-                name="health_check",
-                description="Check Flask server health",
-                inputSchema={"type": "object", "properties": {}}
-            )
-        ]
+            },
+            "required": ["content", "output_id"]
+        }
+    ),
+    types.Tool(
+        name="get_status",
+        description="Get processing status by ID",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "processing_id": {"type": "string"}
+            },
+            "required": ["processing_id"]
+        }
+    ),
+    types.Tool(
+        name="list_data",
+        description="List all saved data entries",
+        inputSchema={"type": "object", "properties": {}}
+    ),
+    types.Tool(
+        name="get_data",
+        description="Get data by ID",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "data_id": {"type": "string"}
+            },
+            "required": ["data_id"]
+        }
+    ),
+    types.Tool(
+        name="delete_data",
+        description="Delete data by ID",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "data_id": {"type": "string"}
+            },
+            "required": ["data_id"]
+        }
+    ),
+    types.Tool(
+        name="list_templates",
+        description="List available XML templates",
+        inputSchema={"type": "object", "properties": {}}
+    ),
+    types.Tool(
+        name="health_check",
+        description="Check Flask server health",
+        inputSchema={"type": "object", "properties": {}}
+    )
+]
+
+
+@server.list_tools()
+async def handle_list_tools() -> List[types.Tool]:
+    """Define available MCP tools"""
+    return _TOOL_LIST
+
+
+def _json_text(value: Any) -> str:
+    """Format a backend result as indented JSON text"""
+    return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+
+
+def _xml_text(xml_bytes: bytes) -> str:
+    """Decode a generated document without its XML declaration, as the tool has always returned it"""
+    if xml_bytes.startswith(b"<?xml"):
+        xml_bytes = xml_bytes[xml_bytes.index(b"?>") + 2:].lstrip(b"\n")
+    return xml_bytes.decode("utf-8")
+
+
+def _process_texts(result: Dict[str, Any]) -> Tuple[str, str]:
+    """Return the XML document verbatim, then the rest of a /process result as JSON"""
+    rest = {key: value for key, value in result.items() if key != "xml_output"}
+    return result["xml_output"], _json_text(rest)
+
+
+# Tool name -> (call the backend with the tool arguments, format a successful
+# result as one text or a tuple of texts, error when the result is not
+# successful). The error is formatted with the tool arguments; None skips
+# the success check.
+_HANDLERS: Dict[str, Tuple[Callable[[Dict[str, Any]], Awaitable[Any]],
+                           Callable[[Any], Union[str, Tuple[str, ...]]],
+                           Optional[str]]] = {
+    "analyze_input": (
+        lambda args: flask_client.analyze_input(
+            args["content"], args.get("input_type", "text"), args.get("options", {})
+        ),
+        lambda result: _json_text(result["analysis"]),
+        "Analysis failed"
+    ),
+    # Fetch the document directly instead of unwrapping it from JSON;
+    # failures are raised by the client
+    "generate_xml": (
+        lambda args: flask_client.generate_xml_raw(
+            args["analysis"], args["output_id"], args.get("template", "default"),
+            {"pretty": True, **args.get("options", {})}
+        ),
+        _xml_text,
+        None
+    ),
+    "process_input": (
+        lambda args: flask_client.process_complete(
+            args["content"], args["output_id"], args.get("input_type", "text"),
+            args.get("template", "default"), args.get("options", {})
+        ),
+        _json_text,
+        "Processing failed"
+    ),
+    "get_status": (
+        lambda args: flask_client.get_status(args["processing_id"]),
+        _json_text,
+        "Status check failed"
+    ),
+    "list_data": (
+        lambda args: flask_client.list_data(),
+        lambda result: _json_text(result["data"]),
+        "Data listing failed"
+    ),
+    "get_data": (
+        lambda args: flask_client.get_data(args["data_id"]),
+        lambda result: _json_text(result["data"]),
+        "Data {data_id} not found"
+    ),
+    "delete_data": (
+        lambda args: flask_client.delete_data(args["data_id"]),
+        lambda result: result["message"],
+        "Failed to delete {data_id}"
+    ),
+    "list_templates": (
+        lambda args: flask_client.list_templates(),
+        lambda result: _json_text(result["templates"]),
+        "Template listing failed"
+    ),
+    "health_check": (
+        lambda args: flask_client.health_check(),
+        _json_text,
+        None
+    )
+}
+
+# Formatters used instead of the _HANDLERS ones when a tool is called with
+# xml_as_text, so the XML document is not escaped inside a JSON string
+_XML_AS_TEXT_FORMATS: Dict[str, Callable[[Any], Tuple[str, ...]]] = {
+    "process_input": _process_texts
+}
 
 
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
     """Handle tool calls by delegating to Flask server"""
     try:
-        if name == "analyze_input":
-            content = arguments["content"]
-            input_type = arguments.get("input_type", "text")
-            options = arguments.get("options", {})
-            
-            result = await flask_client.analyze_input(content, input_type, options)
-            
-            if result.get("success"):
-                return [types.TextContent(
-                    type="text", text=json.dumps(result["analysis"], indent=2)
-                )]
-            else:
-                raise Exception(result.get("error", "Analysis failed"))
-        
-        elif name == "generate_xml":
-            analysis = arguments["analysis"]
-            output_id = arguments["output_id"]
-            template = arguments.get("template", "default")
-            options = arguments.get("options", {})
-            
-            result = await flask_client.generate_xml(analysis, output_id, template, options)
-            
-            if result.get("success"):
-                return [types.TextContent(
-                    type="text", text=result["xml_output"]
-                )]
-            else:
-                raise Exception(result.get("error", "XML generation failed"))
-        
-        elif name == "process_input":
-            content = arguments["content"]
-            input_type = arguments.get("input_type", "text")
-            output_id = arguments["output_id"]
-            template = arguments.get("template", "default")
-            options = arguments.get("options", {})
-            
-            result = await flask_client.process_complete(content, output_id, input_type, template, options)
-            
-            if result.get("success"):
-                return [types.TextContent(
-                    type="text", text=json.dumps(result, indent=2)
-                )]
-            else:
-                raise Exception(result.get("error", "Processing failed"))
+        handler = _HANDLERS.get(name)
+        if handler is None:
+            return [types.TextContent(
+                type="text", text=f"Unknown tool: {name}")]
         
-        elif name == "get_status":
-            processing_id = arguments["processing_id"]
-            
-            result = await flask_client.get_status(processing_id)
-            
-            if result.get("success"):
-                return [types.TextContent(
-                    type="text", text=json.dumps(result, indent=2)
-                )]
-            else:
-                raise Exception(result.get("error", "Status check failed"))
+        call, format_result, failure = handler
+        result = await call(arguments)
         
-        elif name == "list_data":
-            result = await flask_client.list_data()
-            
-            if result.get("success"):
-                return [types.TextContent(
-                    type="text", text=json.dumps(result["data"], indent=2)
-                )]
-            else:
-                raise Exception(result.get("error", "Data listing failed"))
+        if failure is not None and not result.get("success"):
+            raise Exception(result.get("error", failure.format(**arguments)))
         
-        elif name == "get_data":
-            data_id = arguments["data_id"]
-            
-            result = await flask_client.get_data(data_id)
-            
-            if result.get("success"):
-                return [types.TextContent(
-                    type="text", text=json.dumps(result["data"], indent=2)
-                )]
-            else:
-                raise Exception(result.get("error", f"Data {data_id} not found"))
+        if arguments.get("xml_as_text"):
+            format_result = _XML_AS_TEXT_FORMATS.get(name, format_result)
         
-        elif name == "delete_data":
-            data_id = arguments["data_id"]
-            
-            result = await flask_client.delete_data(data_id)
-            
-            if result.get("success"):
-                return [types.TextContent(
-                    type="text", text=result["message"]
-                )]
-            else:
-                raise Exception(result.get("error", f"Failed to delete {data_id}"))
+        texts = format_result(result)
+        if isinstance(texts, str):
+            texts = (texts,)
         
-        elif name == "list_templates":
-            result = await flask_client.list_templates()
-            
-            if result.get("success"):
-                return [types.TextContent(
-                    type="text", text=json.dumps(result["templates"], indent=2)
-                )]
-            else:
-                raise Exception(result.get("error", "Template listing failed"))
-        
-        elif name == "health_check":
-            result = await flask_client.health_check()
-            
-            return [types.TextContent(
-                type="text", text=json.dumps(result, indent=2))]
-        
-        else:
-            return [types.TextContent(
-                type="text", text=f"Unknown tool: {name}")]
+        return [types.TextContent(type="text", text=text) for text in texts]
     
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        logger.error(f"Error in {name}: {e}")
-        logger.error(f"Full traceback: {error_details}")
+        # Most failures are expected backend errors; only format the
+        # traceback when debug logging is on
+        logger.error("Error in %s: %s", name, e)
+        logger.debug("Full traceback for %s", name, exc_info=True)
         return [types.TextContent(
             type="text", text=f"Error in {name}: {str(e)}"
         )]
@@ -612,8 +793,21 @@ def setup_signal_handlers():
         flask_manager.stop_flask_server()
         exit(0)
     
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    async def shutdown(signum):
+        logger.info(f"Received signal {signum}, shutting down...")
+        # Close idle keep-alive connections first; gunicorn waits for open
+        # connections before it exits on SIGTERM
+        await flask_client.close()
+        flask_manager.stop_flask_server()
+        exit(0)
+    
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, lambda signum=signum: loop.create_task(shutdown(signum)))
+        except NotImplementedError:
+            # No event loop signal handlers (Windows)
+            signal.signal(signum, signal_handler)
 
 
 async def main():
@@ -625,16 +819,22 @@ async def main():
     setup_signal_handlers()
     
     # Step 1: Start Flask server
-    logger.info("📦 Starting Flask backend server...")
-    if flask_manager.start_flask_server():
-        logger.info(f"✓ Flask server running on {FLASK_BASE_URL}")
+    if flask_client.backend_mode == "inproc":
+        logger.info("📦 Using in-process Flask backend")
     else:
-        logger.error("❌ Failed to start Flask server")
-        logger.error("Cannot proceed without Flask backend")
-        return
+        logger.info("📦 Starting Flask backend server...")
+        if await flask_manager.start_flask_server():
+            logger.info(f"✓ Flask server running on {FLASK_BASE_URL}")
+        else:
+            logger.error("❌ Failed to start Flask server")
+            logger.error("Cannot proceed without Flask backend")
+            return
     
-    # Step 2: Test Flask server connection
+        await flask_client.open()
+    
+    # Step 2: Test Flask server connection, backing off from 50 ms up to 1 s
     max_retries = 5
+    delay = 0.05
     for attempt in range(max_retries):
         try:
             await flask_client.health_check()
@@ -643,7 +843,8 @@ async def main():
         except Exception as e:
             if attempt < max_retries - 1:
                 logger.warning(f"Flask health check failed (attempt {attempt + 1}/{max_retries}), retrying...")
-                await asyncio.sleep(1)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 1.0)
             else:
                 logger.error(f"❌ Flask server health check failed after {max_retries} attempts: {e}")
                 flask_manager.stop_flask_server()
@@ -688,9 +889,12 @@ async def main():
         # Clean up
         logger.info("🛑 Shutting down servers...")
         
-        # Give a moment for any pending requests to complete
+        # Let in-flight requests finish, for at most a second, instead of
+        # sleeping a fixed time
         try:
-            await asyncio.sleep(0.5)
+            pending = asyncio.all_tasks() - {asyncio.current_task()}
+            if pending:
+                await asyncio.wait(pending, timeout=1.0)
         except:
             pass
         
@@ -710,4 +914,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # uvloop's event loop is faster for the stdio and HTTP traffic when installed
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file
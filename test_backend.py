@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Test Flask Backend for XML-MCP Template
+
+This script checks storage and the REST API against temporary databases,
+using Flask's test client. No servers need to be running.
+"""
+
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import orjson
+import requests
+
+_BASE_DIR = Path(__file__).resolve().parent
+
+# Make the app package importable
+if str(_BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(_BASE_DIR))
+
+from app.processors.data_manager import DataManager
+
+def test_storage_restart():
+    """Test that results survive a restart and deleted results stay deleted"""
+    print("\n🔍 Testing storage across restarts...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "data.db"
+        legacy_path = Path(tmp) / "data.json"
+        legacy_path.write_bytes(orjson.dumps({
+            "_default": {"1": {"result_id": "legacy-1", "status": "completed"}}
+        }))
+        
+        data_manager = DataManager(db_path, legacy_path=legacy_path, write_behind=True)
+        assert data_manager.get_result("legacy-1") is not None
+        print("✓ Legacy JSON imported")
+        
+        assert data_manager.store_result("sync-1", {"status": "completed"})
+        assert data_manager.store_result_async("async-1", {"status": "completed"})
+        assert data_manager.get_result("async-1") is not None
+        data_manager.flush()
+        data_manager.conn.close()
+        
+        data_manager = DataManager(db_path, legacy_path=legacy_path)
+        stored = {result["result_id"] for result in data_manager.list_all()}
+        assert stored == {"legacy-1", "sync-1", "async-1"}, stored
+        print("✓ Results read back after restart")
+        
+        for result_id in stored:
+            assert data_manager.delete_result(result_id)
+        data_manager.conn.close()
+        
+        data_manager = DataManager(db_path, legacy_path=legacy_path)
+        assert data_manager.list_all() == []
+        data_manager.conn.close()
+        print("✓ Deleted results stay deleted after restart")
+
+def _free_port():
+    """Return a TCP port nothing is listening on"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def test_sigterm_flush():
+    """Test that a write-behind server stopped with SIGTERM keeps its queued results"""
+    print("\n🔍 Testing queued writes across SIGTERM...")
+    
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, FLASK_PORT=str(port), WRITE_BEHIND="true")
+    # Serve with the development server, which run.py uses when gunicorn is
+    # not installed
+    process = subprocess.Popen(
+        [sys.executable, "-c", "import run; run.BaseApplication = None; run.main()"],
+        cwd=_BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    processing_ids = []
+    
+    try:
+        with requests.Session() as session:
+            deadline = time.monotonic() + 10
+            while True:
+                try:
+                    session.get(f"{base_url}/health", timeout=1)
+                    break
+                except requests.exceptions.ConnectionError:
+                    assert process.poll() is None and time.monotonic() < deadline, "server did not start"
+                    time.sleep(0.05)
+            
+            for index in range(20):
+                response = session.post(f"{base_url}/api/analyze", json={"content": f"queued write {index}"}, timeout=5)
+                assert response.status_code == 200
+                processing_ids.append(response.json()["processing_id"])
+        print(f"✓ {len(processing_ids)} results queued")
+        
+        # Stop the server straight after the last response, while writes
+        # may still be queued
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0, process.returncode
+        print("✓ Server exited cleanly on SIGTERM")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    
+    data_manager = DataManager(_BASE_DIR / "storage" / "data.db")
+    try:
+        missing = [pid for pid in processing_ids if data_manager.get_result(pid) is None]
+        assert not missing, f"{len(missing)} queued results lost"
+        print("✓ Queued results read back after SIGTERM")
+    finally:
+        for processing_id in processing_ids:
+            data_manager.delete_result(processing_id)
+        data_manager.conn.close()
+
+def _client(tmp):
+    """Flask test client for the app, storing into a database under tmp"""
+    from app import create_app
+    from app.routes import api
+    
+    api.data_manager = DataManager(Path(tmp) / "data.db")
+    return create_app().test_client()
+
+def test_bulk_and_batch():
+    """Test /api/data/bulk and /api/batch, including their validation"""
+    print("\n🔍 Testing bulk and batch endpoints...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        client = _client(tmp)
+        
+        # Bodies that are not objects, or hold non-object items, are rejected
+        for endpoint, body in [
+            ("/api/data/bulk", [1, 2]),
+            ("/api/data/bulk", {"results": []}),
+            ("/api/data/bulk", {"results": ["x"]}),
+            ("/api/batch", [1, 2]),
+            ("/api/batch", {"endpoint": "nope", "requests": []}),
+            ("/api/batch", {"endpoint": "analyze", "requests": "x"}),
+            ("/api/batch", {"endpoint": "analyze", "requests": [1]})
+        ]:
+            response = client.post(endpoint, json=body)
+            assert response.status_code == 400, (endpoint, body, response.status_code)
+        print("✓ Invalid bodies rejected with 400")
+        
+        response = client.post("/api/data/bulk", json={
+            "results": [{"result_id": "bulk-1", "status": "completed"}, {"status": "completed"}]
+        })
+        assert response.status_code == 200
+        result_ids = response.get_json()["result_ids"]
+        assert result_ids[0] == "bulk-1" and len(result_ids) == 2
+        for result_id in result_ids:
+            assert client.get(f"/api/data/{result_id}").status_code == 200
+        print("✓ Bulk results stored")
+        
+        # One bad request in a batch fails alone; results come back in order
+        response = client.post("/api/batch", json={
+            "endpoint": "analyze",
+            "requests": [
+                {"content": "# First\n- a feature"},
+                {},
+                {"content": "second document", "input_type": "text"}
+            ]
+        })
+        assert response.status_code == 200
+        results = response.get_json()["results"]
+        assert [result["status"] for result in results] == [200, 400, 200]
+        assert results[0]["body"]["analysis"]["input_type"] == "text"
+        assert results[2]["body"]["analysis"]["word_count"] == 2
+        for result in (results[0], results[2]):
+            processing_id = result["body"]["processing_id"]
+            assert client.get(f"/api/status/{processing_id}").status_code == 200
+        print("✓ Batched analyses answered in order and stored")
+
+        # Batches above BATCH_POOL_MIN_CHARS are analyzed on the process pool
+        from app.routes.api import BATCH_POOL_MIN_CHARS
+        content = "word " * (BATCH_POOL_MIN_CHARS // 10 + 1)
+        response = client.post("/api/batch", json={
+            "endpoint": "analyze",
+            "requests": [{"content": content}, {"content": content}]
+        })
+        assert response.status_code == 200
+        results = response.get_json()["results"]
+        assert [result["status"] for result in results] == [200, 200]
+        assert results[1]["body"]["analysis"]["word_count"] == BATCH_POOL_MIN_CHARS // 10 + 1
+        print("✓ Large batch analyzed on the process pool")
+
+def test_async_process():
+    """Test that an asynchronous /process job reaches completed"""
+    print("\n🔍 Testing asynchronous processing...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        client = _client(tmp)
+        
+        response = client.post("/api/process", json={
+            "content": "# Async Test\n\n## Requirements\n- Feature A",
+            "input_type": "markdown",
+            "output_id": "async-test-001",
+            "async": True
+        })
+        assert response.status_code == 202, response.status_code
+        processing_id = response.get_json()["processing_id"]
+        status_url = response.headers["Location"]
+        print("✓ Job accepted")
+        
+        deadline = time.monotonic() + 30
+        while True:
+            result = client.get(status_url).get_json()
+            if result["status"] != "processing" or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        
+        assert result["status"] == "completed", result
+        assert result["result"]["processing_id"] == processing_id
+        assert "<Output" in result["result"]["xml_output"]
+        print("✓ Job completed with its XML output")
+
+def test_mcp_client_requests():
+    """Test that the MCP client shares only in-flight requests"""
+    print("\n🔍 Testing MCP client request sharing...")
+    
+    from app.routes import api
+    from server import FlaskAPIClient
+    
+    async def run(client):
+        # Identical concurrent analyses each store their own record
+        results = await asyncio.gather(*[client.analyze_input("same text") for _ in range(3)])
+        assert len({result["processing_id"] for result in results}) == 3
+        print("✓ Concurrent identical analyses stored separately")
+        
+        # Identical concurrent generate calls for one output_id share one request
+        analysis = results[0]["analysis"]
+        sent = []
+        request_body = client._request_body
+        
+        async def counting_request_body(method, endpoint, data=None):
+            sent.append(endpoint)
+            return await request_body(method, endpoint, data)
+        
+        client._request_body = counting_request_body
+        documents = await asyncio.gather(*[client.generate_xml_raw(analysis, "mcp-test-001") for _ in range(3)])
+        assert len(sent) == 1 and len(set(documents)) == 1, sent
+        print("✓ Concurrent identical generate calls shared one request")
+        
+        # A repeated call after delete_data stores the record again
+        await client.generate_xml_raw(analysis, "mcp-test-001")
+        await client.delete_data("mcp-test-001")
+        await client.generate_xml_raw(analysis, "mcp-test-001")
+        assert (await client.get_data("mcp-test-001"))["success"]
+        assert not client._in_flight
+        print("✓ Repeated call after delete_data stored its record again")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        api.data_manager = DataManager(Path(tmp) / "data.db")
+        asyncio.run(run(FlaskAPIClient(backend_mode="inproc")))
+
+def main():
+    """Run all tests"""
+    print("XML-MCP Template Backend Test")
+    print("=" * 50)
+    
+    tests = [
+        ("Storage Restart", test_storage_restart),
+        ("SIGTERM Flush", test_sigterm_flush),
+        ("Bulk and Batch", test_bulk_and_batch),
+        ("Async Process", test_async_process),
+        ("MCP Client Requests", test_mcp_client_requests)
+    ]
+    
+    results = []
+    
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e!r}")
+            import traceback
+            traceback.print_exc()
+            results.append((test_name, False))
+    
+    print("\n" + "=" * 50)
+    print("📋 Test Results Summary:")
+    print("=" * 50)
+    
+    passed = 0
+    total = len(results)
+    
+    for test_name, result in results:
+        status = "✓ PASS" if result else "❌ FAIL"
+        print(f"{status:8} {test_name}")
+        if result:
+            passed += 1
+    
+    print(f"\nResults: {passed}/{total} tests passed")
+    return 0 if passed == total else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
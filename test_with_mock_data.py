@@ -7,19 +7,55 @@ It shows how the tools work with realistic content and generates example outputs
 """
 
 import asyncio
+import functools
 import json
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import time
 from pathlib import Path
 
+_BASE_DIR = Path(__file__).resolve().parent
+
+# Request bodies are pre-encoded with orjson and sent with this header
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Static parts of the test request bodies; the workflow test's body has no
+# dynamic fields, so it is encoded once here
+ANALYZE_BODY_TEMPLATE = {
+    "input_type": "markdown",
+    "options": {
+        "extract_features": True,
+        "complexity_analysis": True
+    }
+}
+
+GENERATE_BODY_TEMPLATE = {
+    "output_id": "test-task-packet-001",
+    "template": "task_packet",
+    "options": {
+        "include_timeline": True,
+        "include_risks": True
+    }
+}
+
+PROCESS_BODY = orjson.dumps({
+    "content": "# Quick Test Document\n\nThis is a quick test of the complete workflow.\n\n## Requirements\n- Feature A\n- Feature B\n- Feature C",
+    "input_type": "markdown",
+    "output_id": "test-workflow-001",
+    "template": "analysis_report",
+    "options": {
+        "detailed_analysis": True
+    }
+})
+
+@functools.lru_cache(maxsize=1)
 def load_sample_content():
     """Load sample PRD content for testing"""
-    base_dir = Path(__file__).parent
-    prd_file = base_dir / "examples" / "sample-prd.md"
+    prd_file = _BASE_DIR / "examples" / "sample-prd.md"
     
-    if prd_file.exists():
-        with open(prd_file, 'r', encoding='utf-8') as f:
-            return f.read()
+    if prd_file.is_file():
+        return prd_file.read_text(encoding='utf-8')
     else:
         return """# Sample Project Requirements
         
@@ -45,6 +81,14 @@ This is a sample project requirements document for testing the XML-MCP template.
 
 async def test_flask_api():
     """Test the Flask API endpoints with mock data"""
+    with requests.Session() as session:
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        # Responses from localhost are not worth compressing
+        session.headers["Accept-Encoding"] = "identity"
+        return await run_api_tests(session)
+
+async def run_api_tests(session):
+    """Run the Flask API tests on a pooled session"""
     base_url = "http://localhost:5001"
     
     print("🧪 Testing XML-MCP Template with Mock Data")
@@ -53,7 +97,7 @@ async def test_flask_api():
     # Test 1: Health Check
     print("\n1. Testing health endpoint...")
     try:
-        response = requests.get(f"{base_url}/health", timeout=5)
+        response = session.get(f"{base_url}/health", timeout=5)
         if response.status_code == 200:
             health_data = response.json()
             print(f"✅ Health check passed: {health_data.get('status')}")
@@ -68,19 +112,13 @@ async def test_flask_api():
     print("\n2. Testing analysis with sample PRD...")
     sample_content = load_sample_content()
     
-    analyze_data = {
-        "content": sample_content,
-        "input_type": "markdown",
-        "options": {
-            "extract_features": True,
-            "complexity_analysis": True
-        }
-    }
+    analyze_data = {"content": sample_content, **ANALYZE_BODY_TEMPLATE}
     
     try:
-        response = requests.post(
+        response = session.post(
             f"{base_url}/api/analyze",
-            json=analyze_data,
+            data=orjson.dumps(analyze_data),
+            headers=JSON_HEADERS,
             timeout=15
         )
         
@@ -109,20 +147,13 @@ async def test_flask_api():
     # Test 3: Generate XML Task Packet
     print("\n3. Testing XML generation with task packet template...")
     
-    xml_data = {
-        "analysis": analysis_result,
-        "output_id": "test-task-packet-001",
-        "template": "task_packet",
-        "options": {
-            "include_timeline": True,
-            "include_risks": True
-        }
-    }
+    xml_data = {"analysis": analysis_result, **GENERATE_BODY_TEMPLATE}
     
     try:
-        response = requests.post(
+        response = session.post(
             f"{base_url}/api/generate",
-            json=xml_data,
+            data=orjson.dumps(xml_data),
+            headers=JSON_HEADERS,
             timeout=15
         )
         
@@ -135,9 +166,8 @@ async def test_flask_api():
                 print(f"   📦 Template: task_packet")
                 
                 # Save sample output
-                output_file = Path(__file__).parent / "examples" / "generated-task-packet.xml"
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(xml_output)
+                output_file = _BASE_DIR / "examples" / "generated-task-packet.xml"
+                output_file.write_bytes(xml_output.encode('utf-8'))
                 print(f"   💾 Saved to: {output_file}")
             else:
                 print(f"❌ XML generation failed: {result.get('error')}")
@@ -152,20 +182,11 @@ async def test_flask_api():
     # Test 4: Complete Workflow (Process)
     print("\n4. Testing complete workflow...")
     
-    process_data = {
-        "content": "# Quick Test Document\n\nThis is a quick test of the complete workflow.\n\n## Requirements\n- Feature A\n- Feature B\n- Feature C",
-        "input_type": "markdown",
-        "output_id": "test-workflow-001", 
-        "template": "analysis_report",
-        "options": {
-            "detailed_analysis": True
-        }
-    }
-    
     try:
-        response = requests.post(
+        response = session.post(
             f"{base_url}/api/process",
-            json=process_data,
+            data=PROCESS_BODY,
+            headers=JSON_HEADERS,
             timeout=15
         )
         
@@ -190,7 +211,7 @@ async def test_flask_api():
     print("\n5. Testing templates endpoint...")
     
     try:
-        response = requests.get(f"{base_url}/api/templates", timeout=5)
+        response = session.get(f"{base_url}/api/templates", timeout=5)
         if response.status_code == 200:
             result = response.json()
             if result.get("success"):
@@ -209,7 +230,7 @@ async def test_flask_api():
     print("\n6. Testing data listing...")
     
     try:
-        response = requests.get(f"{base_url}/api/data", timeout=5)
+        response = session.get(f"{base_url}/api/data", timeout=5)
         if response.status_code == 200:
             result = response.json()
             if result.get("success"):
@@ -227,7 +248,7 @@ async def test_flask_api():
     print("\n🎉 Mock data testing completed!")
     print("\n📁 Generated files:")
     print("   - examples/generated-task-packet.xml")
-    print("   - storage/data.json (TinyDB storage)")
+    print("   - storage/data.db (SQLite storage)")
     
     return True
 